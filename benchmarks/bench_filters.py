@@ -0,0 +1,75 @@
+"""Sidebar filtering: string-built ``df.query`` vs. the precomputed ``FilterIndex``.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_filters
+"""
+import time
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.synthetic import synthetic_responses, synthetic_selection
+from task5 import pipeline, prep
+from task5.filters import FilterIndex
+
+SIZES = [10_000, 100_000, 1_000_000]
+SETTINGS = 50
+
+
+def query_counts(df, filters):
+    # the dashboard's original filtering and counting
+    querystring = "`lastpage` == 12" if filters.complete else "`lastpage` != 0"
+    first_lang = list(filters.first_lang)
+    age_from, age_to = filters.age
+    exp_from, exp_to = filters.experience
+    df = df.query(
+        querystring + " & " + "`PLANG` == @first_lang & `PAGE` >= @age_from & `PAGE` <= @age_to & `PENGEXP` >= @exp_from & `PENGEXP` <= @exp_to"
+    )
+    df_resp = df.drop_duplicates(subset=["id"])
+    return len(df_resp), len(df_resp.drop_duplicates(subset=["CODE"]))
+
+
+def index_counts(index, filters):
+    mask = index.mask(filters)
+    return index.count_responses(mask), index.count_users(mask)
+
+
+def random_settings(df, rng):
+    langs = list(df["PLANG"].dropna().unique())
+    for _ in range(SETTINGS):
+        yield pipeline.Filters.normalize(
+            rng.random() < 0.5,
+            sorted(rng.integers(16, 90, 2)),
+            sorted(rng.integers(0, 70, 2)),
+            [lang for lang in langs if rng.random() < 0.7],
+        )
+
+
+def main():
+    rows = []
+    for n_rows in SIZES:
+        selection = synthetic_selection()
+        df = prep.prepare_responses(synthetic_responses(n_rows, selection), selection)
+        settings = list(random_settings(df, np.random.default_rng(0)))
+
+        start = time.perf_counter()
+        index = FilterIndex(df)
+        t_build = time.perf_counter() - start
+
+        start = time.perf_counter()
+        expected = [query_counts(df, f) for f in settings]
+        t_query = (time.perf_counter() - start) / SETTINGS
+
+        start = time.perf_counter()
+        actual = [index_counts(index, f) for f in settings]
+        t_index = (time.perf_counter() - start) / SETTINGS
+        assert expected == actual
+
+        rows.append({"rows": n_rows, "index_build_s": t_build, "query_s": t_query,
+                     "mask_s": t_index, "speedup": t_query / t_index})
+    print(pd.DataFrame(rows).to_string(index=False, float_format=lambda x: f"{x:.5f}"))
+
+
+if __name__ == "__main__":
+    main()
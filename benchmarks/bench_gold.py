@@ -0,0 +1,51 @@
+"""Gold-standard join: per-row ``lookup_helper`` scans vs. ``prep.attach_gold``.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_gold
+"""
+import time
+
+import pandas as pd
+
+from benchmarks.synthetic import synthetic_responses, synthetic_selection
+from task5 import prep
+
+SIZES = [(1_000, 100), (10_000, 1_000), (50_000, 5_000)]
+
+
+def lookup_join(df, task5_selection):
+    # the dashboard's original implementation
+    def lookup_helper(wp_id, target):
+        val = task5_selection[task5_selection["id"] == wp_id]
+        return val.iloc[0][target]
+
+    df = df.copy()
+    df["class"] = df["WP1"].apply(lambda x: lookup_helper(x, "wordplay"))
+    df["location"] = df["WP1"].apply(lambda x: lookup_helper(x, "location"))
+    return df
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+
+def main():
+    rows = []
+    for n_rows, n_selection in SIZES:
+        selection = synthetic_selection(n_selection)
+        df = synthetic_responses(n_rows, selection)
+
+        old, t_old = timed(lambda: lookup_join(df, selection))
+        new, t_new = timed(lambda: prep.attach_gold(df, selection))
+        pd.testing.assert_frame_equal(old[["class", "location"]], new[["class", "location"]], check_dtype=False)
+
+        rows.append({"rows": n_rows, "selection": n_selection, "lookup_helper_s": t_old,
+                     "attach_gold_s": t_new, "speedup": t_old / t_new})
+    print(pd.DataFrame(rows).to_string(index=False, float_format=lambda x: f"{x:.4f}"))
+
+
+if __name__ == "__main__":
+    main()
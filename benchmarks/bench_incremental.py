@@ -0,0 +1,73 @@
+"""Split ingestion: ``IncrementalState`` over two exports vs. ``pipeline.evaluate`` on the full one.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_incremental [SPLIT ...]
+
+For every split point the survey export in data/ is cut into a first export
+(the rows before the split) and the full export, both are ingested one
+after the other, and the resulting summary must equal
+``pipeline.summary(pipeline.evaluate(...))`` with all filters open, chart
+tallies included. The times are those of the second ingest and of a full evaluation.
+"""
+import math
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import pandas as pd
+
+from task5 import incremental, ingest, pipeline
+
+DEFAULT_SPLITS = [1, 250, 400]
+
+
+def assert_same(expected, actual, path="summary"):
+    if isinstance(expected, dict):
+        for key, value in actual.items():
+            assert_same(expected[key], value, f"{path}.{key}")
+    elif isinstance(expected, float):
+        assert math.isclose(expected, actual, rel_tol=1e-9, abs_tol=1e-12), (path, expected, actual)
+    else:
+        assert expected == actual, (path, expected, actual)
+
+
+def main(argv):
+    splits = [int(a) for a in argv] or DEFAULT_SPLITS
+    df, _, _ = pipeline.load(ingest.DATA_DIR)
+    results = pipeline.evaluate(df, pipeline.Filters.everything(df), n_boot=0)
+    expected = {key: value for key, value in pipeline.summary(results).items() if key not in ("filters",)}
+    expected["irr"] = {"alpha": expected["irr"]["alpha"]}
+    for key in ("user_counts", "wordplay_counts"):
+        expected[key] = {col: dict(zip(frame[col], frame["counts"])) for col, frame in results[key].items()}
+
+    raw = pd.read_excel(ingest.DATA_DIR / ingest.RESPONSES_FILE, engine="openpyxl", sheet_name="Sheet1")
+    rows = []
+    for split in splits:
+        with tempfile.TemporaryDirectory() as tmp:
+            data_dir, cache_dir = Path(tmp), Path(tmp) / "cache"
+            shutil.copy(ingest.DATA_DIR / ingest.SELECTION_FILE, data_dir / ingest.SELECTION_FILE)
+            state = incremental.IncrementalState()
+
+            raw.iloc[:split].to_excel(data_dir / ingest.RESPONSES_FILE, sheet_name="Sheet1", index=False)
+            first = incremental.ingest_export(state, data_dir, cache_dir)
+
+            shutil.copy(ingest.DATA_DIR / ingest.RESPONSES_FILE, data_dir / ingest.RESPONSES_FILE)
+            start = time.perf_counter()
+            second = incremental.ingest_export(state, data_dir, cache_dir)
+            t_ingest = time.perf_counter() - start
+
+        assert_same(expected, state.summary())
+
+        start = time.perf_counter()
+        pipeline.evaluate(df, pipeline.Filters.everything(df), n_boot=0)
+        t_evaluate = time.perf_counter() - start
+        rows.append({"split": split, "first_ratings": first, "second_ratings": second,
+                     "ingest_s": t_ingest, "evaluate_s": t_evaluate})
+    print(pd.DataFrame(rows).to_string(index=False, float_format=lambda x: f"{x:.4f}"))
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
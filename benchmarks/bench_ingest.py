@@ -0,0 +1,55 @@
+"""Cold-start times of the survey workbook: openpyxl vs. the columnar cache.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_ingest [ROWS ...]
+
+For each size a synthetic export is written to a temporary directory and
+loaded three ways: plain ``pd.read_excel``, a first start that also builds
+the cache, and a later start that only memory-maps the cache.
+"""
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import pandas as pd
+
+from benchmarks.synthetic import synthetic_responses
+from task5 import ingest
+
+DEFAULT_SIZES = [1_000, 10_000, 50_000]
+
+
+def timed(fn, repeat=1):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def bench(n_rows):
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        path = tmp / "responses.xlsx"
+        synthetic_responses(n_rows).to_excel(path, sheet_name="Sheet1", index=False)
+        cache_dir = tmp / "cache"
+
+        xlsx = timed(lambda: pd.read_excel(path, engine="openpyxl", sheet_name="Sheet1"))
+        first = timed(lambda: ingest.load_workbook(path, cache_dir=cache_dir))
+        warm = timed(lambda: ingest.load_workbook(path, cache_dir=cache_dir), repeat=5)
+
+    return {"rows": n_rows, "read_excel_s": xlsx, "first_start_s": first, "cached_start_s": warm,
+            "speedup": xlsx / warm}
+
+
+def main(argv):
+    sizes = [int(a) for a in argv] or DEFAULT_SIZES
+    results = pd.DataFrame([bench(n) for n in sizes])
+    print(results.to_string(index=False, float_format=lambda x: f"{x:.4f}"))
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
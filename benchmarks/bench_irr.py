@@ -0,0 +1,45 @@
+"""Krippendorff's alpha: simpledorff vs. the coincidence-matrix engine in ``task5.irr``.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_irr
+"""
+import time
+
+import numpy as np
+import pandas as pd
+import simpledorff
+
+from benchmarks.synthetic import synthetic_responses, synthetic_selection
+from task5 import irr
+
+SIZES = [(1_000, 100), (10_000, 1_000), (100_000, 5_000)]
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+
+def main():
+    rows = []
+    for n_rows, n_selection in SIZES:
+        df = synthetic_responses(n_rows, synthetic_selection(n_selection))
+
+        expected, t_simple = timed(lambda: simpledorff.calculate_krippendorffs_alpha_for_df(
+            df, experiment_col="WP1", annotator_col="CODE", class_col="WCLASS"))
+        dense, t_dense = timed(lambda: irr.krippendorff_alpha(df))
+        sparse, t_sparse = timed(lambda: irr.krippendorff_alpha(df, sparse=True))
+        assert np.isclose(expected, dense) and np.isclose(expected, sparse)
+
+        boot, t_boot = timed(lambda: irr.bootstrap_alpha(df, n_boot=5_000, seed=0))
+
+        rows.append({"rows": n_rows, "units": n_selection, "alpha": dense, "simpledorff_s": t_simple,
+                     "dense_s": t_dense, "sparse_s": t_sparse, "speedup": t_simple / t_dense,
+                     "ci": f"[{boot.low:.3f}, {boot.high:.3f}]", "bootstrap_5000_s": t_boot})
+    print(pd.DataFrame(rows).to_string(index=False, float_format=lambda x: f"{x:.4f}"))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""Normalized localisation labels: per-row fuzzy matching vs. the precomputed ``TokenIndex``.
+
+The synthetic answers are the gold pun word with random noise (case,
+punctuation, inflection, a typo) or a distractor, as typed answers are.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_localisation
+"""
+import time
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.synthetic import synthetic_responses, synthetic_selection
+from task5 import localisation
+
+SIZES = [10_000, 100_000, 300_000]
+NOISE = [
+    lambda w: w,
+    lambda w: w.upper(),
+    lambda w: f" {w}!",
+    lambda w: f"'{w}s'",
+    lambda w: w[:2] + w[3:] if len(w) > 4 else w,
+    lambda w: "the",
+]
+
+
+def noisy_answers(df, rng):
+    noise = rng.integers(0, len(NOISE), len(df))
+    return [None if not isinstance(w, str) else NOISE[k](w) for w, k in zip(df["WLOC"], noise)]
+
+
+def per_row_labels(wordplays, answers, texts):
+    # tokenize the wordplay text again for every single answer, no reuse
+    labels = []
+    for wp, answer in zip(wordplays, answers):
+        text = localisation.TextTokens(texts[wp])
+        labels.append(" ".join(text.match(token) for token in localisation.tokenize(answer)))
+    return labels
+
+
+def main():
+    rows = []
+    selection = synthetic_selection()
+    texts = selection.set_index("id")["text"].to_dict()
+    for n_rows in SIZES:
+        df = synthetic_responses(n_rows, selection)
+        answers = noisy_answers(df, np.random.default_rng(0))
+        wordplays = df["WP1"].to_numpy()
+
+        start = time.perf_counter()
+        expected = per_row_labels(wordplays, answers, texts)
+        t_row = time.perf_counter() - start
+
+        start = time.perf_counter()
+        index = localisation.TokenIndex(selection)
+        actual = index.labels(wordplays, answers)
+        t_index = time.perf_counter() - start
+        assert expected == actual.tolist()
+
+        rows.append({"rows": n_rows, "distinct_pairs": len(index.resolved),
+                     "per_row_s": t_row, "index_s": t_index, "speedup": t_row / t_index})
+    print(pd.DataFrame(rows).to_string(index=False, float_format=lambda x: f"{x:.4f}"))
+
+
+if __name__ == "__main__":
+    main()
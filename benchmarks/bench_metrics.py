@@ -0,0 +1,68 @@
+"""Classification and localisation scores: eight sklearn calls vs. ``task5.metrics``.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_metrics
+"""
+import time
+import warnings
+
+import numpy as np
+import pandas as pd
+from sklearn.exceptions import UndefinedMetricWarning
+from sklearn.metrics import f1_score, precision_score, recall_score, accuracy_score
+
+from benchmarks.synthetic import synthetic_responses, synthetic_selection
+from task5 import metrics, pipeline, prep
+
+SIZES = [(1_000, 100), (100_000, 1_000), (300_000, 5_000)]
+
+
+def sklearn_scores(df):
+    # the dashboard's original calls
+    location = df["location"].str.lower().fillna("nan").astype(str)
+    answer = df["WLOC"].fillna("nan").astype(str)
+    return [
+        f1_score(df["class"], df["WCLASS"], average="binary", pos_label="yes"),
+        precision_score(df["class"], df["WCLASS"], average="binary", pos_label="yes"),
+        recall_score(df["class"], df["WCLASS"], average="binary", pos_label="yes"),
+        accuracy_score(df["class"], df["WCLASS"]),
+        f1_score(location, answer, average="macro"),
+        precision_score(location, answer, average="macro"),
+        recall_score(location, answer, average="macro"),
+        accuracy_score(location, answer),
+    ]
+
+
+def engine_scores(df):
+    classification = pipeline.classification_scores(df)
+    location = pipeline.location_scores(df)
+    return [classification[s] for s in metrics.SCORES] + [location[s] for s in metrics.SCORES]
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+
+def main():
+    # labels the humans never used are scored 0 by both implementations
+    warnings.filterwarnings("ignore", category=UndefinedMetricWarning)
+    rows = []
+    for n_rows, n_selection in SIZES:
+        selection = synthetic_selection(n_selection)
+        df = prep.prepare_responses(synthetic_responses(n_rows, selection), selection)
+
+        expected, t_sklearn = timed(lambda: sklearn_scores(df))
+        actual, t_engine = timed(lambda: engine_scores(df))
+        assert np.allclose(expected, actual)
+        _, t_groups = timed(lambda: pipeline.breakdowns(df))
+
+        rows.append({"rows": n_rows, "sklearn_s": t_sklearn, "engine_s": t_engine,
+                     "speedup": t_sklearn / t_engine, "breakdowns_s": t_groups})
+    print(pd.DataFrame(rows).to_string(index=False, float_format=lambda x: f"{x:.4f}"))
+
+
+if __name__ == "__main__":
+    main()
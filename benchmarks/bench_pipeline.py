@@ -0,0 +1,115 @@
+"""Stage-by-stage cost of a dashboard start and rerun on synthetic exports.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_pipeline                       # 10k, 100k and 1M rows
+    python -m benchmarks.bench_pipeline --json baseline.json  # keep the numbers
+    python -m benchmarks.bench_pipeline --baseline baseline.json
+
+Every size goes through what a fresh server does: load the responses from
+the columnar cache (the workbook itself is too slow to write at 1M rows),
+prep, the filter index, one evaluation with all filters open and one with a
+narrower setting, and the Vega-Lite specs of all charts. The stages are the
+``task5.profiling`` spans the dashboard's debug panel shows. With
+``--baseline`` any stage that got slower than ``--tolerance`` times the
+saved number (and by more than ``--floor`` seconds) is reported and the
+exit status is 1.
+"""
+import argparse
+import json
+import sys
+import tempfile
+from pathlib import Path
+
+import altair as alt
+import pandas as pd
+
+from benchmarks.synthetic import synthetic_responses, synthetic_selection
+from task5 import charts, ingest, pipeline, prep, profiling
+from task5.filters import FilterIndex
+
+DEFAULT_SIZES = [10_000, 100_000, 1_000_000]
+
+
+def run(n_rows, n_boot, trace_memory=False):
+    """The span records of one cold start plus two reruns over ``n_rows`` synthetic ratings."""
+    selection = synthetic_selection()
+    raw = synthetic_responses(n_rows, selection)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        target = Path(tmp) / "responses--Sheet1"
+        ingest.write_cache(raw, target)
+        del raw
+
+        with profiling.Profiler(trace_memory=trace_memory) as profiler:
+            with profiling.span("excel load"):
+                with profiling.span("read cache"):
+                    df = ingest.read_cache(target)
+            with profiling.span("prep"):
+                prep.missing_gold_ids(df, selection)
+                df = prep.prepare_responses(df, selection)
+            with profiling.span("filter index"):
+                index = FilterIndex(df)
+
+            everything = pipeline.Filters.everything(df)
+            narrow = everything._replace(complete=True, age=(20, 40))
+            for label, filters in [("all", everything), ("narrow", narrow)]:
+                with profiling.span(f"evaluate {label}"):
+                    results = pipeline.evaluate(df, filters, n_boot=n_boot, index=index)
+
+            with profiling.span("altair serialization"):
+                for col, counts in {**results["user_counts"], **results["wordplay_counts"]}.items():
+                    charts.payload_bytes(alt.Chart(counts).mark_bar().encode(x=f"{col}:N", y="counts:Q"))
+
+    return profiler.records()
+
+
+def compare(current, baseline, tolerance, floor):
+    """Stages slower than ``tolerance`` x their baseline, as readable lines."""
+    before = {(r["rows"], r["path"]): r["seconds"] for r in baseline}
+    slower = []
+    for r in current:
+        old = before.get((r["rows"], r["path"]))
+        if old is not None and r["seconds"] > tolerance * old and r["seconds"] - old > floor:
+            slower.append(f"{r['rows']:>9} rows  {r['path']}: {old:.3f}s -> {r['seconds']:.3f}s")
+    return slower
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.bench_pipeline", description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", nargs="+", type=int, default=DEFAULT_SIZES, metavar="ROWS")
+    parser.add_argument("--bootstrap", type=int, default=100, metavar="N", help="IRR bootstrap replicates (default: 100)")
+    parser.add_argument("--memory", action="store_true", help="trace allocations too (slower)")
+    parser.add_argument("--json", metavar="FILE", help="write the spans and import times to FILE")
+    parser.add_argument("--baseline", metavar="FILE", help="compare against a file written with --json")
+    parser.add_argument("--tolerance", type=float, default=1.5, help="allowed slowdown factor (default: 1.5)")
+    parser.add_argument("--floor", type=float, default=0.05, help="ignore slowdowns below this many seconds")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+
+    spans = []
+    for n_rows in args.sizes:
+        spans += [{"rows": n_rows, **record} for record in run(n_rows, args.bootstrap, args.memory)]
+    imports = profiling.import_times()
+
+    table = pd.DataFrame(spans).pivot_table(index="path", columns="rows", values="seconds", aggfunc="sum", sort=False)
+    print(table.to_string(float_format=lambda x: f"{x:.4f}"))
+    print()
+    print(pd.DataFrame(imports).to_string(index=False, float_format=lambda x: f"{x:.4f}"))
+
+    if args.json:
+        Path(args.json).write_text(json.dumps({"spans": spans, "imports": imports}, indent=2))
+
+    if args.baseline:
+        slower = compare(spans, json.loads(Path(args.baseline).read_text())["spans"], args.tolerance, args.floor)
+        if slower:
+            print("\nslower than the baseline:", *slower, sep="\n")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
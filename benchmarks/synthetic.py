@@ -0,0 +1,86 @@
+"""Synthetic survey exports shaped like results-survey883364-wordplays.xlsx.
+
+Every generated response rates ten random entries of the gold selection,
+participants can submit several responses under the same code and roughly
+two thirds of the answers agree with the gold standard.
+"""
+import numpy as np
+import pandas as pd
+
+LANGUAGES = ["German", "Polish", "Spanish", "French", "English", "Other (please use comment box)"]
+COUNTRIES = ["Germany", "Poland", "Spain", "France", "Other (please use comment box)"]
+YES_NO = np.array(["Yes", "No"], dtype=object)
+
+RATINGS_PER_RESPONSE = 10
+
+
+def synthetic_selection(n_entries=100, seed=42):
+    """A gold selection with the columns of task5_survey_selection.xlsx."""
+    rng = np.random.default_rng(seed)
+    ids = rng.choice(np.arange(1, 50 * n_entries), size=n_entries, replace=False)
+    words = np.array(["pupils", "piece", "spark", "scratch", "relative", "hands", "two", "derivative", "nowhere", "sale"])
+    picked = words[rng.integers(0, len(words), n_entries)]
+    is_wordplay = rng.random(n_entries) < 0.65
+    return pd.DataFrame({
+        "id": ids,
+        "desc": [f"en_{i}" for i in ids],
+        "text": [f"Entry {i} is all about the {w} of it." for i, w in zip(ids, picked)],
+        "wordplay": np.where(is_wordplay, "yes", "no"),
+        "location": pd.Series(np.where(is_wordplay, picked, None), dtype="str"),
+    })
+
+
+def synthetic_responses(n_rows, selection=None, seed=42):
+    """``n_rows`` classified wordplays, grouped into responses of ten ratings each."""
+    rng = np.random.default_rng(seed)
+    if selection is None:
+        selection = synthetic_selection(seed=seed)
+
+    n_resp = max(1, -(-n_rows // RATINGS_PER_RESPONSE))
+    n_users = max(1, int(n_resp / 1.2))
+
+    # participant attributes, shared by all of a participant's responses
+    user_lang = rng.integers(0, len(LANGUAGES), n_users)
+    user_org = rng.integers(0, len(COUNTRIES), n_users)
+    user_age = rng.integers(16, 90, n_users)
+    user_exp = np.where(rng.random(n_users) < 0.1, np.nan, rng.integers(0, 40, n_users))
+    user_exp = np.where(np.array(LANGUAGES)[user_lang] == "English", np.nan, user_exp)
+
+    resp_user = rng.integers(0, n_users, n_resp)
+    resp_lastpage = np.where(rng.random(n_resp) < 0.9, 12, rng.integers(2, 12, n_resp))
+
+    resp = np.repeat(np.arange(n_resp), RATINGS_PER_RESPONSE)[:n_rows]
+    user = resp_user[resp]
+
+    sel = rng.integers(0, len(selection), n_rows)
+    gold_yes = selection["wordplay"].to_numpy()[sel] == "yes"
+    agrees = rng.random(n_rows) < 0.67
+    says_yes = np.where(agrees, gold_yes, ~gold_yes)
+    gold_loc = selection["location"].to_numpy(dtype=object)[sel]
+    loc = np.where(rng.random(n_rows) < 0.4, gold_loc, "the")
+
+    def follow_up():
+        return np.where(says_yes, YES_NO[rng.integers(0, 2, n_rows)], None)
+
+    return pd.DataFrame({
+        "id": resp + 1,
+        "lastpage": resp_lastpage[resp],
+        "CODE": pd.Series([f"u{u:07d}" for u in user], dtype="str"),
+        "PLANG": np.array(LANGUAGES)[user_lang[user]],
+        "PLANG[comment]": pd.Series(None, index=range(n_rows), dtype="str"),
+        "PENGEXP": user_exp[user],
+        "PORG": np.array(COUNTRIES)[user_org[user]],
+        "PORG[comment]": pd.Series(None, index=range(n_rows), dtype="str"),
+        "PAGE": user_age[user],
+        "WP1": selection["id"].to_numpy()[sel],
+        "WCLASS": np.where(says_yes, "Yes", "No"),
+        "WLOC": pd.Series(np.where(says_yes, loc, None), dtype="str"),
+        "WUNDER": pd.Series(follow_up(), dtype="str"),
+        "WKNOWN": pd.Series(follow_up(), dtype="str"),
+        "WFUNNY": pd.Series(follow_up(), dtype="str"),
+        "WOFFENS": pd.Series(follow_up(), dtype="str"),
+        "WLIFE": pd.Series(follow_up(), dtype="str"),
+        "WTRANS": pd.Series(np.where(says_yes, "Eine Übersetzung.", None), dtype="str"),
+        "WOTHER": pd.Series(None, index=range(n_rows), dtype="str"),
+        "WHIDDEN": np.full(n_rows, np.nan),
+    })
@@ -1,54 +1,38 @@
 import pandas as pd
 import streamlit as st
 import altair as alt
-import math
-import simpledorff
-from sklearn.metrics import f1_score, precision_score, recall_score, accuracy_score
+from task5 import charts, ingest, localisation, memo, pipeline, profiling
+from task5.filters import FilterIndex
 
 st.set_page_config(page_title="Task 5: Human performance on JOKER wordplay classification",
                     page_icon=":black_joker:",
                     layout="wide"
 )
 
-@st.cache_data
-def get_excel_data():
-    df = pd.read_excel(
-        io= 'data/results-survey883364-wordplays.xlsx',
-        engine= 'openpyxl',
-        sheet_name= 'Sheet1'
-    )
-    task5_selection = pd.read_excel(
-        io = 'data/task5_survey_selection.xlsx',
-        engine= 'openpyxl',
-        sheet_name= 'Sheet1'
-    )
-    return df, task5_selection
-
-df, task5_selection = get_excel_data()
-count_all_entries = len(df)
-
-# for native speakers...
-def exp_helper(row):
-    if row["PLANG"] == "English":
-        return row["PAGE"]
-    elif math.isnan(row["PENGEXP"]):
-        return 0
-    else:
-        return row["PENGEXP"]
-
-df["PENGEXP"] = df.apply(exp_helper, axis=1)
-
-# add gold standard to each row
-def lookup_helper(wp_id, target):
-    val = task5_selection[task5_selection["id"] == wp_id]
-    return val.iloc[0][target]
+@st.cache_resource(max_entries=1)
+def get_excel_data(export):
+    # workbooks are memory-mapped from .cache/, gold standard and participant features attached;
+    # shared read-only by all sessions, together with the filter masks and the startup timings.
+    # `export` only keys the cache: a replaced workbook is loaded on the next rerun
+    with profiling.Profiler() as startup:
+        df, task5_selection, missing_gold = pipeline.load()
+        with profiling.span("filter index"):
+            filter_index = FilterIndex(df)
+    return df, task5_selection, missing_gold, filter_index, startup
+
+@st.cache_resource(max_entries=1)
+def get_results_cache(export):
+    # shared by all sessions, one entry per filter combination of the current export
+    return memo.LRUCache(maxsize=64)
 
-df["class"] = df["WP1"].apply(lambda x: lookup_helper(x, "wordplay"))
-df["location"] = df["WP1"].apply(lambda x: lookup_helper(x, "location"))
+@st.cache_data
+def get_import_times():
+    # cold imports, measured once in a fresh interpreter
+    return profiling.import_times()
 
-# more prep
-df["WCLASS"] = df["WCLASS"].str.lower()
-df["WLOC"] = df["WLOC"].str.lower()
+export = tuple(ingest.file_stamp(ingest.DATA_DIR / name) for name in (ingest.RESPONSES_FILE, ingest.SELECTION_FILE))
+df, task5_selection, missing_gold, filter_index, startup = get_excel_data(export)
+count_all_entries = len(df)
 
 # --- sidebar ---
 st.sidebar.header("Filter here:")
@@ -82,34 +66,62 @@ first_lang = st.sidebar.multiselect(
     default=df["PLANG"].unique(),
 )
 
-
-querystring = "`lastpage` == 12" if is_complete else "`lastpage` != 0"
-
-df = df.query(
-    querystring + " & " + "`PLANG` == @first_lang & `PAGE` >= @age_from & `PAGE` <= @age_to & `PENGEXP` >= @exp_from & `PENGEXP` <= @exp_to"
-)
-
-df_resp = df.drop_duplicates(subset=["id"])
-count_resp = len(df_resp)
-
-df_users = df_resp.drop_duplicates(subset=["CODE"])
-count_users = len(df_users)
-
-# --- Mainpage ---
-st.title(":black_joker: Task 5: Human performance on JOKER wordplay classification")
-st.subheader("by TheLangVerse (Gregor Große-Bölting, Anna Ledworowska and Ismael Cross Moreno)")
-st.markdown("##")
-
-
-col1, col2, col3, col4 = st.columns(4)
-
-col1.metric("Classified wordplayes", count_all_entries)
-col2.metric("Number of survey responses", count_resp)
-col3.metric("Number of participants", count_users)
-col4.metric("English language experience in years", int(df_users["PENGEXP"].sum()))
-
-
-st.markdown("""
+st.sidebar.markdown("---")
+debug = st.sidebar.checkbox("Profile this rerun", help="Time every stage and trace memory (slower)")
+profiler = profiling.Profiler(trace_memory=True).start() if debug else None
+
+try:
+    filters = pipeline.Filters.normalize(is_complete, (age_from, age_to), (exp_from, exp_to), first_lang)
+    results_cache = get_results_cache(export)
+    with profiling.span("evaluate"):
+        results = results_cache.get_or_compute(filters, lambda: pipeline.evaluate(df, filters, index=filter_index))
+
+    st.sidebar.caption("Result cache: {hits} hits, {misses} misses, {size}/{maxsize} filter settings".format(**results_cache.info()))
+
+    # the tables show survey data only, not the precomputed localisation labels
+    label_columns = [col for pair in localisation.LABEL_COLUMNS.values() for col in pair]
+    df_users = df.iloc[results["user_rows"]].drop(columns=label_columns)
+    df = df.iloc[results["rows"]].drop(columns=label_columns)
+    count_resp = results["count_resp"]
+    count_users = results["count_users"]
+
+    # only aggregated chart data and one page of a raw table reach the browser;
+    # their size is measured (one more serialization) only while profiling
+    payload = {}
+
+    def show_chart(container, chart, name):
+        with profiling.span(f"altair serialization: {name}"):
+            if debug:
+                payload[f"chart: {name}"] = charts.payload_bytes(chart)
+            container.altair_chart(chart, use_container_width=True)
+
+    def show_table(data, name):
+        pages = charts.page_count(data)
+        number = st.number_input(f"Page (of {pages})", 1, pages, 1, key=f"page-{name}")
+        with profiling.span(f"table page: {name}"):
+            rows = charts.page(data, number)
+            if debug:
+                payload[f"table: {name}"] = len(rows.to_json(orient="split").encode("utf-8"))
+            st.dataframe(rows)
+        st.caption(f"{len(data)} {name} in total, {charts.PAGE_SIZE} per page")
+
+    # --- Mainpage ---
+    st.title(":black_joker: Task 5: Human performance on JOKER wordplay classification")
+    st.subheader("by TheLangVerse (Gregor Große-Bölting, Anna Ledworowska and Ismael Cross Moreno)")
+    st.markdown("##")
+
+    if missing_gold:
+        st.warning(f"No gold standard for the rated wordplays {missing_gold}; they are scored as missing.")
+
+    col1, col2, col3, col4 = st.columns(4)
+
+    col1.metric("Classified wordplayes", count_all_entries)
+    col2.metric("Number of survey responses", count_resp)
+    col3.metric("Number of participants", count_users)
+    col4.metric("English language experience in years", int(results["english_experience"]))
+
+
+    st.markdown("""
 ## I. INTRODUCTION
 
 > Humour remains one of the most thorny aspects of intercultural communication. Understanding humour often requires recognition of implicit cultural references or, especially in the case of wordplay, knowledge of word formation processes and discernment of double meanings. These issues raise the question not only of how to translate humour across cultures and languages, but also how to even recognise it in the first place. Such tasks are challenging for humans and computers alike. (Ermakova et al., 2023)
@@ -182,96 +194,90 @@ The age distribution shows a wide range, with survey participants between 16 and
 
 """)
 
-tab1, tab2 = st.tabs(["Visualizations", "Raw User Data"])
+    tab1, tab2 = st.tabs(["Visualizations", "Raw User Data"])
 
-with tab1:
-    col1, col2 = st.columns(2)
+    with tab1:
+        col1, col2 = st.columns(2)
 
-    # First language
-    vals = pd.DataFrame(list(df_users["PLANG"].value_counts().to_dict().items()),
-                        columns=["First Language", "counts"])
+        # First language
+        vals = results["user_counts"]["PLANG"].rename(columns={"PLANG": "First Language"})
 
-    c = alt.Chart(vals).mark_arc().encode(
-        color = alt.X("First Language:N"),
-        theta = "counts:Q",
-    )
+        c = alt.Chart(vals).mark_arc().encode(
+            color = alt.X("First Language:N"),
+            theta = "counts:Q",
+        )
 
-    col1.altair_chart(c, use_container_width=True)
+        show_chart(col1, c, "First language")
 
-    # Origin
-    vals = pd.DataFrame(list(df_users["PORG"].value_counts().to_dict().items()),
-                        columns=["Origin Country", "counts"])
+        # Origin
+        vals = results["user_counts"]["PORG"].rename(columns={"PORG": "Origin Country"})
 
-    c = alt.Chart(vals).mark_arc().encode(
-        color = alt.X("Origin Country:N"),
-        theta = "counts:Q",
-    )
+        c = alt.Chart(vals).mark_arc().encode(
+            color = alt.X("Origin Country:N"),
+            theta = "counts:Q",
+        )
 
-    col2.altair_chart(c, use_container_width=True)
+        show_chart(col2, c, "Origin")
 
-    # Age Distribution
-    vals = pd.DataFrame(list(df_users["PAGE"].value_counts().to_dict().items()),
-                        columns=["Age", "counts"])
+        # Age Distribution
+        vals = results["user_counts"]["PAGE"].rename(columns={"PAGE": "Age"})
 
-    c = alt.Chart(vals).mark_bar().encode(
-        x = alt.X("Age:N"),
-        y = "counts:Q",
-    )
+        c = alt.Chart(vals).mark_bar().encode(
+            x = alt.X("Age:N"),
+            y = "counts:Q",
+        )
 
-    col1, col2 = st.columns(2)
+        col1, col2 = st.columns(2)
 
-    col1.altair_chart(c, use_container_width=True)
+        show_chart(col1, c, "Age")
 
-    # English Experience Distribution
+        # English Experience Distribution
 
-    vals = pd.DataFrame(list(df_users["PENGEXP"].value_counts().to_dict().items()),
-                        columns=["English experience", "counts"])
+        vals = results["user_counts"]["PENGEXP"].rename(columns={"PENGEXP": "English experience"})
 
-    c = alt.Chart(vals).mark_bar().encode(
-        x = alt.X("English experience:N"),
-        y = "counts:Q",
-    )
+        c = alt.Chart(vals).mark_bar().encode(
+            x = alt.X("English experience:N"),
+            y = "counts:Q",
+        )
 
-    col2.altair_chart(c, use_container_width=True)
+        show_chart(col2, c, "English experience")
 
 
-with tab2:
-    # will be removed later on
-    st.dataframe(df_users)
+    with tab2:
+        show_table(df_users, "participants")
 
-"""
+    """
 If respondents identified an entry as a pun, this was followed by several more questions aimed at further characterising the pun. The visualizations below summarize the results of these more in-depth questions: 
 
 Only about 14% of respondents had problems understanding an identified pun, although most were previously unknown (only 12% were previously known). Regarding the funniness, opinions are divided: Slightly more than half (52%) found the puns funny. Only a small proportion (5%) were perceived as offensive or objectionable. 26% of the puns were rated in a way that the respondents could imagine using them in real life.
 """
 
-tab1, tab2 = st.tabs(["Visualizations", "Raw Wordplay Data"])
+    tab1, tab2 = st.tabs(["Visualizations", "Raw Wordplay Data"])
 
-with tab1:
-    # Understanding, preknowledge, funnieness, offensivness and life-usage as pies
-    col1, col2, col3, col4, col5 = st.columns(5)
+    with tab1:
+        # Understanding, preknowledge, funnieness, offensivness and life-usage as pies
+        col1, col2, col3, col4, col5 = st.columns(5)
 
-    def create_pie(element,name,coln):
-        vals = pd.DataFrame(list(df[element].value_counts().to_dict().items()),
-                            columns=[name, "counts"])
+        def create_pie(element,name,coln):
+            vals = results["wordplay_counts"][element].rename(columns={element: name})
 
-        c = alt.Chart(vals).mark_arc().encode(
-            color = alt.X(name+":N"),
-            theta = "counts:Q",
-        )
+            c = alt.Chart(vals).mark_arc().encode(
+                color = alt.X(name+":N"),
+                theta = "counts:Q",
+            )
 
-        coln.altair_chart(c, use_container_width=True)
+            show_chart(coln, c, name)
 
-    create_pie("WUNDER","understanding",col1)
-    create_pie("WKNOWN","preknowledge",col2)
-    create_pie("WFUNNY","funnieness",col3)
-    create_pie("WOFFENS","offensivness",col4)
-    create_pie("WLIFE","life-usage",col5)
+        create_pie("WUNDER","understanding",col1)
+        create_pie("WKNOWN","preknowledge",col2)
+        create_pie("WFUNNY","funnieness",col3)
+        create_pie("WOFFENS","offensivness",col4)
+        create_pie("WLIFE","life-usage",col5)
 
-with tab2: 
-    st.dataframe(df)
+    with tab2: 
+        show_table(df, "ratings")
 
-st.markdown("""
+    st.markdown("""
 
 ### 4.2 Human performance
 
@@ -282,37 +288,49 @@ In the following, human performance in the evaluation and localisation of pun wo
 For the classification of the puns, the human raters were shown a random entry from the dataset of previously 100 randomly selected entries from the training dataset and asked the simple question: Is this a wordplay? Only 'yes' and 'no' were available as answer options; unlike all other binary questions, no option was given not to answer this question. The performance of the human raters is as follows: 
 """)
 
-# F1, Recall, Precision, Accuracy on the data for classification
-col1, col2, col3, col4 = st.columns(4)
+    # F1, Recall, Precision, Accuracy on the data for classification
+    col1, col2, col3, col4 = st.columns(4)
+
+    scores = results["classification"]
+    col1.metric("F1 Score", round(scores["f1"], 2))
+    col2.metric("Precision", round(scores["precision"], 2))
+    col3.metric("Recall", round(scores["recall"], 2))
+    col4.metric("Accuracy", round(scores["accuracy"], 2))
 
-col1.metric("F1 Score", round(f1_score(df["class"], df["WCLASS"], average="binary", pos_label="yes"), 2))
-col2.metric("Precision", round(precision_score(df["class"], df["WCLASS"], average="binary", pos_label="yes"), 2))
-col3.metric("Recall", round(recall_score(df["class"], df["WCLASS"], average="binary", pos_label="yes"), 2))
-col4.metric("Accuracy", round(accuracy_score(df["class"], df["WCLASS"]), 2))
+    with st.expander("Classification scores by group"):
+        group = st.radio("Group by", list(results["breakdowns"]), horizontal=True)
+        st.dataframe(results["breakdowns"][group].round(2), use_container_width=True)
 
-st.markdown("""
+    st.markdown("""
 #### Localizing pun words
 
 The localisation of pun words is a difficult linguistic task. For the following analysis, no further cleaning was done on the data, i.e. an exact match between the test data and the human ratings was required. 
 
 """)
 
-# F1, Recall and Precision on the data for word location
-col1, col2, col3, col4 = st.columns(4)
-
-df["location"] = df["location"].str.lower()
-col1.metric("F1 Score", round(f1_score(df["location"].astype(str), df["WLOC"].astype(str), average="macro"), 2))
-col2.metric("Precision", round(precision_score(df["location"].astype(str), df["WLOC"].astype(str), average="macro"), 2))
-col3.metric("Recall", round(recall_score(df["location"].astype(str), df["WLOC"].astype(str), average="macro"), 2))
-col4.metric("Accuracy", round(accuracy_score(df["location"].astype(str), df["WLOC"].astype(str).astype(str)), 2))
-
-# Inter rater reliability
-irr = simpledorff.calculate_krippendorffs_alpha_for_df(df,experiment_col='WP1',
-                                                 annotator_col='CODE',
-                                                 class_col='WCLASS')
-print(irr)
-
-st.markdown("""
+    # F1, Recall and Precision on the data for word location
+    col1, col2, col3, col4 = st.columns(4)
+
+    scores = results["location"]
+    col1.metric("F1 Score", round(scores["f1"], 2))
+    col2.metric("Precision", round(scores["precision"], 2))
+    col3.metric("Recall", round(scores["recall"], 2))
+    col4.metric("Accuracy", round(scores["accuracy"], 2))
+
+    # the same scores after normalizing punctuation, inflection and small typos
+    with st.expander("Scores with normalized matching"):
+        st.caption("Answers and gold locations are mapped onto the tokens of the wordplay text: punctuation and whitespace are ignored, inflected forms and answers within a small edit distance count as the same word.")
+        col1, col2, col3, col4 = st.columns(4)
+        scores = results["location_normalized"]
+        col1.metric("F1 Score", round(scores["f1"], 2))
+        col2.metric("Precision", round(scores["precision"], 2))
+        col3.metric("Recall", round(scores["recall"], 2))
+        col4.metric("Accuracy", round(scores["accuracy"], 2))
+
+    # Inter rater reliability
+    irr = results["irr"]
+
+    st.markdown("""
 #### Inter-rater reliability
 
 The inter-rater reliability of the human classifiers across the entire data set is 0.19964 (Krippendorff's alpha). This value is far below the values that are commonly accepted as limits of good agreement (see methods section). 
@@ -320,17 +338,18 @@ The inter-rater reliability of the human classifiers across the entire data set
 Thus, this value indicates only very low agreement among the human classifiers in the evaluation of wordplays.
 """)
 
-st.metric("IRR", round(irr, 3))
+    st.metric("IRR", round(irr.alpha, 3))
+    st.caption(f"{int(irr.n_boot)} bootstrap replicates over the rated wordplays, 95% interval: [{irr.low:.3f}, {irr.high:.3f}]")
 
-st.markdown("""
+    st.markdown("""
 #### Intra-rater reliability
 
 Only 27 respondents rated the same entry twice, no entry was rated more than twice by a user; the small number does not allow any statement about how large the intra-rater reliability is, so that no calculation was made here. 
 """)
-#wp_per_user = df.pivot_table(columns=["CODE", "WP1"], aggfunc="size")
-#st.dataframe(wp_per_user)
+    #wp_per_user = df.pivot_table(columns=["CODE", "WP1"], aggfunc="size")
+    #st.dataframe(wp_per_user)
 
-st.markdown("""
+    st.markdown("""
 ## V. DISCUSSION
 
 The evaluation of the human classification of puns shows some interesting results: The F1 score of 0.74 and an accuracy of 0.69 is less high than one would initially expect, suggesting that humans also have problems to some extent in assessing the entries in the dataset. At the same time, the level of agreement among raters is very low. However, given Medelyan's (2009) observations above, it is consistent with expectations regarding untrained, non-native human raters. Of course, it should also be noted that humour is in the eye of the beholder and depends very much on cultural and linguistic circumstances and prior experience. Since people from several European and non-European countries took part in the survey, a variety of assessments can be expected accordingly. Another indication of this is provided by the assessments of the puns: Only a few were known beforehand and opinions regarding their funniness vary widely; moreover, the puns do not seem to be convincing enough for the respondents to adopt them into their own linguistic vocabulary. 
@@ -367,3 +386,32 @@ Participants from various European and non-European countries took part in our s
 
 """)
 
+
+    # --- payload of this rerun, per chart and table page ---
+    if debug:
+        with st.sidebar.expander("Payload per rerun"):
+            sizes = pd.DataFrame({"element": list(payload), "bytes": list(payload.values())})
+            st.dataframe(sizes, hide_index=True)
+            st.caption(f"{sum(payload.values()) / 1024:.1f} KiB in total")
+finally:
+    if profiler is not None:
+        profiler.stop()
+
+# --- profile of this rerun, with the one-off startup work ---
+if profiler is not None:
+    with st.sidebar.expander("Profile", expanded=True):
+        def span_table(spans):
+            table = pd.DataFrame(spans, columns=["path", "seconds", "allocated", "peak", "max_rss"])
+            for col in ["allocated", "peak", "max_rss"]:
+                table[col] = (pd.to_numeric(table[col]) / 2**20).round(1)
+            return table.rename(columns={"allocated": "alloc MiB", "peak": "peak MiB", "max_rss": "RSS MiB"})
+
+        st.caption("This rerun (a cached filter setting skips the evaluate stages)")
+        st.dataframe(span_table(profiler.records()), hide_index=True)
+        st.caption("Startup: workbook load and prep, once per server")
+        st.dataframe(span_table(startup.records()), hide_index=True)
+        imports = get_import_times()
+        st.caption("Cold imports")
+        st.dataframe(pd.DataFrame(imports), hide_index=True)
+        st.download_button("Download JSON", profiler.to_json(startup=startup.records(), imports=imports),
+                           file_name="task5-profile.json", mime="application/json")
@@ -0,0 +1 @@
+"""Evaluation helpers behind the Task 5 dashboard (task5-evaluation.py)."""
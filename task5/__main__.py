@@ -0,0 +1,5 @@
+import sys
+
+from task5.cli import main
+
+sys.exit(main())
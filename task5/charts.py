@@ -0,0 +1,40 @@
+"""Aggregated chart data for the dashboard.
+
+The charts only need ``(value, count)`` pairs, so they get exactly that,
+and raw tables are handed out a page at a time. Nothing here imports Altair.
+"""
+import math
+
+import pandas as pd
+
+PAGE_SIZE = 50
+
+
+def tallies(df, columns):
+    """Counts of every value of each column, as one small frame per column.
+
+    Each frame has the column's values plus a ``counts`` column and is sorted
+    by descending count, like ``value_counts``. Missing values are not counted,
+    nor are categories that do not occur.
+    """
+    result = {}
+    for col in columns:
+        counts = df[col].value_counts(sort=True)
+        counts = counts[counts > 0]
+        result[col] = pd.DataFrame({col: counts.index.to_numpy(), "counts": counts.to_numpy()})
+    return result
+
+
+def page_count(df, page_size=PAGE_SIZE):
+    return max(1, math.ceil(len(df) / page_size))
+
+
+def page(df, number, page_size=PAGE_SIZE):
+    """Rows of page ``number`` (1-based) of ``df``."""
+    start = (number - 1) * page_size
+    return df.iloc[start:start + page_size]
+
+
+def payload_bytes(chart):
+    """Size of the Vega-Lite spec (data included) sent to the browser for ``chart``."""
+    return len(chart.to_json().encode("utf-8"))
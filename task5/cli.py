@@ -0,0 +1,184 @@
+"""Headless evaluation of a survey export.
+
+    python -m task5 evaluate --complete --age 18 30 --format csv
+    python -m task5 evaluate --profile profile.json   # stage timings and memory
+    python -m task5 ingest          # only the ratings new since the last run
+    python -m task5 sweep --checkpoint sweep.csv -o slices.csv
+    python -m task5 score runs/*.jsonl -o ranking.csv
+
+Heavy modules (pandas, NumPy) are imported inside the commands, so argument
+parsing and ``--help`` stay instant and nothing pulls in Streamlit.
+"""
+import argparse
+import json
+import math
+import sys
+
+
+def _json_default(value):
+    # NumPy scalars and pandas categories in breakdown records
+    return _finite(value.item()) if hasattr(value, "item") else str(value)
+
+
+def _finite(value):
+    """``value`` with every NaN or infinite float replaced by ``None`` (JSON null)."""
+    if isinstance(value, dict):
+        return {key: _finite(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_finite(item) for item in value]
+    if isinstance(value, float) and not math.isfinite(value):
+        return None
+    return value
+
+
+def write_json(record, out):
+    """``record`` as strict JSON: undefined scores (NaN) are written as null."""
+    json.dump(_finite(record), out, indent=2, default=_json_default, allow_nan=False)
+    out.write("\n")
+
+
+def write_csv(record, out):
+    """One ``section,metric,value`` row per number of the summary."""
+    import csv
+
+    writer = csv.writer(out)
+    writer.writerow(["section", "metric", "value"])
+    for key, value in record.items():
+        if key in ("filters", "breakdowns"):
+            continue
+        if isinstance(value, dict):
+            for metric, number in value.items():
+                if isinstance(number, dict):
+                    # chart tallies: one row per value of the column
+                    writer.writerows([f"{key}.{metric}", item, n] for item, n in number.items())
+                else:
+                    writer.writerow([key, metric, number])
+        else:
+            writer.writerow(["counts", key, value])
+
+
+def write(record, args):
+    out = open(args.output, "w", newline="") if args.output else sys.stdout
+    try:
+        (write_csv if args.format == "csv" else write_json)(record, out)
+    finally:
+        if args.output:
+            out.close()
+
+
+def evaluate(args):
+    from task5 import pipeline, profiling
+
+    profiler = profiling.Profiler(trace_memory=True).start() if args.profile else None
+    df, _, missing_gold = pipeline.load(args.data_dir, use_cache=not args.no_cache)
+    if missing_gold:
+        print(f"warning: no gold standard for wordplays {missing_gold}", file=sys.stderr)
+
+    defaults = pipeline.Filters.everything(df)
+    filters = pipeline.Filters.normalize(
+        args.complete,
+        args.age or defaults.age,
+        args.experience or defaults.experience,
+        args.lang or defaults.first_lang,
+    )
+    results = pipeline.evaluate(df, filters, n_boot=args.bootstrap, processes=args.processes)
+
+    if profiler is not None:
+        profiler.stop()
+        with open(args.profile, "w") as fh:
+            fh.write(profiler.to_json(imports=profiling.import_times()))
+    write(pipeline.summary(results, with_breakdowns=args.breakdowns), args)
+    return 0
+
+
+def ingest(args):
+    from task5 import incremental
+
+    state = incremental.IncrementalState() if args.reset else incremental.IncrementalState.load(args.state)
+    new_ratings = incremental.ingest_export(state, args.data_dir)
+    state.save(args.state)
+
+    write({"new_ratings": new_ratings, **state.summary()}, args)
+    return 0
+
+
+def sweep(args):
+    from task5 import pipeline
+    from task5 import sweep as subgroups
+
+    df, _, _ = pipeline.load(args.data_dir)
+    table = subgroups.sweep(df, checkpoint=args.checkpoint, processes=args.processes)
+
+    out = args.output or sys.stdout
+    if args.format == "csv":
+        table.to_csv(out, index=False)
+    else:
+        table.to_json(out, orient="records", indent=2)
+    return 0
+
+
+def score(args):
+    from task5 import pipeline, scoring
+
+    df, task5_selection, _ = pipeline.load(args.data_dir)
+    table = scoring.score_runs(args.predictions, task5_selection, df, chunksize=args.chunksize)
+
+    out = args.output or sys.stdout
+    if args.format == "csv":
+        table.to_csv(out, index=False)
+    else:
+        table.to_json(out, orient="records", indent=2)
+    return 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="python -m task5", description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    ev = commands.add_parser("evaluate", help="score the human ratings of a survey export")
+    ev.add_argument("--data-dir", default="data", help="directory with the survey workbooks")
+    ev.add_argument("--no-cache", action="store_true", help="parse the workbooks instead of using .cache/")
+    ev.add_argument("--complete", action="store_true", help="complete responses only")
+    ev.add_argument("--age", nargs=2, type=int, metavar=("FROM", "TO"))
+    ev.add_argument("--experience", nargs=2, type=int, metavar=("FROM", "TO"),
+                    help="years of English experience")
+    ev.add_argument("--lang", nargs="+", metavar="LANG", help="first languages to keep")
+    ev.add_argument("--bootstrap", type=int, default=1000, metavar="N",
+                    help="bootstrap replicates for the IRR interval (default: 1000)")
+    ev.add_argument("--processes", type=int, default=1, help="worker processes for the bootstrap")
+    ev.add_argument("--breakdowns", action="store_true", help="add per-group scores (JSON only)")
+    ev.add_argument("--format", choices=["json", "csv"], default="json")
+    ev.add_argument("-o", "--output", help="write to this file instead of stdout")
+    ev.add_argument("--profile", metavar="FILE", help="write stage timings, memory and import times as JSON")
+    ev.set_defaults(func=evaluate)
+
+    inc = commands.add_parser("ingest", help="count only the ratings new since the last ingest")
+    inc.add_argument("--data-dir", default="data", help="directory with the survey workbooks")
+    inc.add_argument("--state", default=".cache/task5/incremental.pkl", help="where the running totals are kept")
+    inc.add_argument("--reset", action="store_true", help="start over instead of continuing the saved state")
+    inc.add_argument("--format", choices=["json", "csv"], default="json")
+    inc.add_argument("-o", "--output", help="write to this file instead of stdout")
+    inc.set_defaults(func=ingest)
+
+    sw = commands.add_parser("sweep", help="scores for every first language x age x experience slice")
+    sw.add_argument("--data-dir", default="data", help="directory with the survey workbooks")
+    sw.add_argument("--checkpoint", help="CSV of finished slices; an interrupted sweep resumes from it")
+    sw.add_argument("--processes", type=int, help="worker processes (default: all cores)")
+    sw.add_argument("--format", choices=["json", "csv"], default="csv")
+    sw.add_argument("-o", "--output", help="write to this file instead of stdout")
+    sw.set_defaults(func=sweep)
+
+    sc = commands.add_parser("score", help="rank system runs against the gold standard and the human raters")
+    sc.add_argument("predictions", nargs="+", help="JSONL or CSV files with run_id, id, class and location")
+    sc.add_argument("--data-dir", default="data", help="directory with the survey workbooks")
+    sc.add_argument("--chunksize", type=int, default=100_000, help="prediction rows read at a time")
+    sc.add_argument("--format", choices=["json", "csv"], default="csv")
+    sc.add_argument("-o", "--output", help="write to this file instead of stdout")
+    sc.set_defaults(func=score)
+
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    return args.func(args)
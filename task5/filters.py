@@ -0,0 +1,88 @@
+"""Precomputed masks and sorted indexes for the sidebar filters.
+
+A :class:`FilterIndex` is built once per loaded export. Any combination of
+the sidebar controls then resolves to a boolean row mask by AND-ing
+precomputed per-value masks (first language, ``lastpage``) with range
+masks cut out of sorted indexes (age, English experience), instead of
+parsing and evaluating a ``df.query`` string on every rerun.
+"""
+import numpy as np
+import pandas as pd
+
+COMPLETE_PAGE = 12
+
+
+class SortedIndex:
+    """Row positions ordered by one numeric column, for inclusive range lookups."""
+
+    def __init__(self, values):
+        values = np.asarray(values, dtype=np.float64)
+        # NaN sorts last and never falls inside a range, like in df.query
+        self.order = np.argsort(values, kind="stable")
+        self.values = values[self.order]
+
+    def between(self, low, high, n_rows):
+        start = np.searchsorted(self.values, low, side="left")
+        stop = np.searchsorted(self.values, high, side="right")
+        mask = np.zeros(n_rows, dtype=bool)
+        mask[self.order[start:stop]] = True
+        return mask
+
+
+class FilterIndex:
+    """Masks over the rows of one prepared response frame (positional)."""
+
+    def __init__(self, df):
+        self.n_rows = len(df)
+
+        lastpage = df["lastpage"].to_numpy()
+        self.complete = lastpage == COMPLETE_PAGE
+        self.nonempty = lastpage != 0
+
+        lang_codes, langs = pd.factorize(df["PLANG"])
+        self.languages = {str(lang): lang_codes == i for i, lang in enumerate(langs)}
+
+        self.age = SortedIndex(df["PAGE"])
+        self.experience = SortedIndex(df["PENGEXP"])
+
+        # integer codes for counting distinct responses and participants under a mask
+        self.response_codes, response_ids = pd.factorize(df["id"], use_na_sentinel=False)
+        self.user_codes, users = pd.factorize(df["CODE"], use_na_sentinel=False)
+        self.n_responses, self.n_users = len(response_ids), len(users)
+
+    def language_mask(self, first_lang):
+        mask = np.zeros(self.n_rows, dtype=bool)
+        for lang in first_lang:
+            if lang in self.languages:
+                mask |= self.languages[lang]
+        return mask
+
+    def mask(self, filters):
+        """Boolean mask of the rows matching a :class:`pipeline.Filters`."""
+        mask = (self.complete if filters.complete else self.nonempty).copy()
+        mask &= self.language_mask(filters.first_lang)
+        mask &= self.age.between(*filters.age, self.n_rows)
+        mask &= self.experience.between(*filters.experience, self.n_rows)
+        return mask
+
+    def first_rows(self, mask, codes):
+        """Positions of the first masked row of every code, in row order."""
+        positions = np.flatnonzero(mask)
+        _, first = np.unique(codes[positions], return_index=True)
+        return np.sort(positions[first])
+
+    def response_rows(self, mask):
+        """Positions of ``df[mask].drop_duplicates(subset=["id"])``."""
+        return self.first_rows(mask, self.response_codes)
+
+    def user_rows(self, mask):
+        """Positions of the participant table: first response per ``CODE``."""
+        responses = np.zeros(self.n_rows, dtype=bool)
+        responses[self.response_rows(mask)] = True
+        return self.first_rows(responses, self.user_codes)
+
+    def count_responses(self, mask):
+        return int(np.count_nonzero(np.bincount(self.response_codes[mask], minlength=self.n_responses)))
+
+    def count_users(self, mask):
+        return int(np.count_nonzero(np.bincount(self.user_codes[mask], minlength=self.n_users)))
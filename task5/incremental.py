@@ -0,0 +1,206 @@
+"""Append-only ingestion of new LimeSurvey exports.
+
+An :class:`IncrementalState` remembers which ratings - ``(id, position)``
+pairs, the response id and the rating's position within that response -
+it has already counted and keeps the aggregates of the dashboard's default
+view (every rating of a non-empty response) up to date: the confusion
+counts of both tasks, the chart tallies, the participant dedup set and the
+coincidence counts behind Krippendorff's alpha. Ingesting a new export
+prepares, counts and scores only the rows it has not seen; the workbook
+itself is still streamed once by openpyxl (XLSX offers no way to read only
+the appended rows), but nothing else touches the old rows. An export whose
+mtime and size are those of the last ingested one is not read at all, and
+the gold selection with its token index is loaded once per state and
+selection file, not per ingest.
+"""
+import pickle
+from collections import Counter, defaultdict
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from task5 import ingest, irr, localisation, metrics, pipeline, prep
+
+STATE_FILE = ingest.CACHE_DIR / "incremental.pkl"
+# bumped whenever the meaning of the saved state changes; an older state is rebuilt
+STATE_VERSION = 3
+
+# column added by read_new_rows: position of a rating within its response
+POSITION_COL = "position"
+
+
+def _key(value):
+    # NaN never equals itself, so it would split dictionary keys
+    return None if pd.isna(value) else value
+
+
+def read_new_rows(path, seen, sheet_name="Sheet1"):
+    """Rows of the export whose ``(id, position)`` is not in ``seen``, streamed with openpyxl.
+
+    ``(id, WP1)`` is not enough: a response can rate the same wordplay twice.
+    The rows come back with their :data:`POSITION_COL`.
+    """
+    import openpyxl
+
+    workbook = openpyxl.load_workbook(path, read_only=True)
+    try:
+        rows = workbook[sheet_name].iter_rows(values_only=True)
+        header = list(next(rows))
+        id_col = header.index("id")
+        positions = Counter()
+        new = []
+        for row in rows:
+            key = (row[id_col], positions[row[id_col]])
+            positions[row[id_col]] += 1
+            if key not in seen:
+                new.append(row + (key[1],))
+    finally:
+        workbook.close()
+    return pd.DataFrame(new, columns=header + [POSITION_COL])
+
+
+class IncrementalState:
+    """Running aggregates over all ratings ingested so far."""
+
+    def __init__(self):
+        self.version = STATE_VERSION
+        # file_stamp of the export counted last
+        self.export = None
+        self.seen = set()
+        self.count_ratings = 0
+        self.response_ids = set()
+        self.users = set()
+        self.english_experience = 0.0
+        self.user_counts = {col: Counter() for col in pipeline.USER_CHARTS}
+        self.wordplay_counts = {col: Counter() for col in pipeline.WORDPLAY_CHARTS}
+        self.class_counts = Counter()
+        self.location_counts = Counter()
+        # first rating per annotator and unit, and the coincidences they add up to
+        self.unit_raters = defaultdict(set)
+        self.unit_values = defaultdict(Counter)
+        self.coincidences = Counter()
+        # (file_stamp, selection, TokenIndex) of the gold selection; not saved
+        self._reference = None
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["_reference"] = None
+        return state
+
+    def reference(self, path, cache_dir=ingest.CACHE_DIR):
+        """The gold selection at ``path`` and its token index, reloaded only when the file changes."""
+        stamp = ingest.file_stamp(path)
+        if self._reference is None or self._reference[0] != stamp:
+            task5_selection = ingest.load_workbook(path, cache_dir=cache_dir)
+            self._reference = (stamp, task5_selection, localisation.TokenIndex(task5_selection))
+        return self._reference[1:]
+
+    @classmethod
+    def load(cls, path=STATE_FILE):
+        path = Path(path)
+        if not path.exists():
+            return cls()
+        with open(path, "rb") as fh:
+            state = pickle.load(fh)
+        # the state only caches counts of the export, so an outdated one is simply rebuilt
+        return state if getattr(state, "version", 1) == STATE_VERSION else cls()
+
+    def save(self, path=STATE_FILE):
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(".tmp")
+        with open(tmp, "wb") as fh:
+            pickle.dump(self, fh)
+        tmp.replace(path)
+
+    def update(self, df):
+        """Add prepared new ratings (see :func:`prep.prepare_responses`) read by :func:`read_new_rows`."""
+        df = df[df["lastpage"] != 0]
+        self.seen.update(zip(df["id"], df[POSITION_COL]))
+        self.count_ratings += len(df)
+        self.response_ids.update(df["id"])
+
+        # participants: the first response of a code counts, as in drop_duplicates
+        for row in df.drop_duplicates(subset=["CODE"]).itertuples(index=False):
+            code = _key(row.CODE)
+            if code in self.users:
+                continue
+            self.users.add(code)
+            self.english_experience += row.PENGEXP
+            for col in pipeline.USER_CHARTS:
+                value = _key(getattr(row, col))
+                if value is not None:
+                    self.user_counts[col][value] += 1
+
+        for col in pipeline.WORDPLAY_CHARTS:
+            self.wordplay_counts[col].update(df[col].dropna().value_counts().to_dict())
+
+        scored = df[df["class"].notna()]
+        self.class_counts.update(Counter(zip(scored["class"], scored["WCLASS"].map(_key))))
+        location, answer = pipeline.location_labels(df)
+        self.location_counts.update(Counter(zip(location, answer)))
+
+        ratings = df[["WP1", "CODE", "WCLASS"]].dropna()
+        touched = set()
+        for unit, annotator, value in ratings.itertuples(index=False):
+            if annotator in self.unit_raters[unit]:
+                continue
+            if unit not in touched:
+                self._add_unit(unit, -1)
+                touched.add(unit)
+            self.unit_raters[unit].add(annotator)
+            self.unit_values[unit][value] += 1
+        for unit in touched:
+            self._add_unit(unit, +1)
+        return len(df)
+
+    def _add_unit(self, unit, sign):
+        """Add (or with ``sign=-1`` remove) one unit's share of the coincidence counts."""
+        values = self.unit_values[unit]
+        m = sum(values.values())
+        if m < 2:
+            return
+        for c, n_c in values.items():
+            for k, n_k in values.items():
+                self.coincidences[c, k] += sign * n_c * (n_k - (c == k)) / (m - 1)
+
+    def alpha(self):
+        labels = sorted({c for c, _ in self.coincidences}, key=str)
+        o = np.array([[self.coincidences[c, k] for k in labels] for c in labels], dtype=np.float64)
+        return irr.alpha_from_coincidences(o.reshape(len(labels), len(labels)))
+
+    def summary(self):
+        return {
+            "count_ratings": self.count_ratings,
+            "count_resp": len(self.response_ids),
+            "count_users": len(self.users),
+            "english_experience": float(self.english_experience),
+            "classification": metrics.scores_from_counts(self.class_counts, average="binary", pos_label="yes"),
+            "location": metrics.scores_from_counts(self.location_counts, average="macro"),
+            "irr": {"alpha": self.alpha()},
+            # chart tallies, most frequent value first like charts.tallies
+            "user_counts": {col: dict(counts.most_common()) for col, counts in self.user_counts.items()},
+            "wordplay_counts": {col: dict(counts.most_common()) for col, counts in self.wordplay_counts.items()},
+        }
+
+
+def ingest_export(state, data_dir=ingest.DATA_DIR, cache_dir=ingest.CACHE_DIR):
+    """Count the ratings of the current export that ``state`` has not seen yet.
+
+    An export that has not changed since the last call is skipped without
+    reading it. The gold selection goes through the columnar cache in
+    ``cache_dir``.
+    """
+    data_dir = Path(data_dir)
+    path = data_dir / ingest.RESPONSES_FILE
+    stamp = ingest.file_stamp(path)
+    if stamp == state.export:
+        return 0
+    new = read_new_rows(path, state.seen)
+    count = 0
+    if not new.empty:
+        task5_selection, tokens = state.reference(data_dir / ingest.SELECTION_FILE, cache_dir)
+        count = state.update(prep.prepare_responses(new, task5_selection, tokens))
+    state.export = stamp
+    return count
@@ -0,0 +1,186 @@
+"""Columnar on-disk cache for the survey workbooks.
+
+Parsing the LimeSurvey exports with openpyxl is by far the slowest part of a
+cold start. Each workbook is therefore converted once into a directory of
+``.npy`` files (one per column) and later starts memory-map those instead of
+re-reading the XLSX. Text columns are stored as integer codes plus a small
+array of distinct values, and come back as categoricals built straight on
+the mapped codes, so no per-row strings are decoded on a start.
+
+The cache for a workbook is valid as long as the source file's mtime and size
+are unchanged, or - if the file was touched - its SHA-256 hash is unchanged.
+Every workbook location gets its own cache directory; whenever one is
+(re)built, the caches of other locations whose workbook no longer exists are
+removed, so moved or deleted exports do not pile up.
+"""
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from task5 import profiling
+
+DATA_DIR = Path("data")
+CACHE_DIR = Path(".cache") / "task5"
+
+RESPONSES_FILE = "results-survey883364-wordplays.xlsx"
+SELECTION_FILE = "task5_survey_selection.xlsx"
+
+MANIFEST = "manifest.json"
+FORMAT_VERSION = 2
+
+
+def file_hash(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as fh:
+        for block in iter(lambda: fh.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def cache_path(path, sheet_name="Sheet1", cache_dir=CACHE_DIR):
+    """Cache directory of one sheet, distinct per workbook location.
+
+    Two exports with the same file name in different directories get
+    separate caches instead of rebuilding over each other.
+    """
+    path = Path(path)
+    location = hashlib.sha256(str(path.resolve()).encode("utf-8")).hexdigest()[:12]
+    return Path(cache_dir) / f"{path.stem}--{sheet_name}--{location}"
+
+
+def _is_numeric(series):
+    return pd.api.types.is_numeric_dtype(series) or pd.api.types.is_datetime64_dtype(series)
+
+
+def write_cache(df, target, source=None):
+    """Write ``df`` column by column into the cache directory ``target``."""
+    target = Path(target)
+    target.parent.mkdir(parents=True, exist_ok=True)
+    tmp = Path(tempfile.mkdtemp(dir=target.parent, prefix=target.name + ".tmp-"))
+
+    columns = []
+    for i, name in enumerate(df.columns):
+        series = df[name]
+        if _is_numeric(series):
+            np.save(tmp / f"{i}.npy", series.to_numpy())
+            columns.append({"name": name, "kind": "numeric", "dtype": str(series.dtype)})
+        else:
+            # missing values get code -1, which a categorical reads back as NaN
+            codes, uniques = pd.factorize(series, use_na_sentinel=True)
+            np.save(tmp / f"{i}.npy", codes.astype(np.int32))
+            np.save(tmp / f"{i}.values.npy", np.asarray(uniques, dtype=object), allow_pickle=True)
+            columns.append({"name": name, "kind": "coded", "dtype": str(series.dtype)})
+
+    manifest = {"version": FORMAT_VERSION, "rows": len(df), "columns": columns}
+    if source is not None:
+        stat = os.stat(source)
+        manifest.update(source=str(Path(source).resolve()), sha256=file_hash(source),
+                        mtime_ns=stat.st_mtime_ns, size=stat.st_size)
+    (tmp / MANIFEST).write_text(json.dumps(manifest))
+
+    # swap the finished directory in, so readers never see a half-written cache
+    if target.exists():
+        shutil.rmtree(target)
+    os.replace(tmp, target)
+
+
+def read_cache(target):
+    """Memory-map a cache directory written by :func:`write_cache`."""
+    target = Path(target)
+    manifest = json.loads((target / MANIFEST).read_text())
+
+    data = {}
+    for i, col in enumerate(manifest["columns"]):
+        # copy-on-write mapping: pages are loaded lazily and in-place edits stay private
+        values = np.load(target / f"{i}.npy", mmap_mode="c").view(np.ndarray)
+        if col["kind"] == "coded":
+            # code -1 (missing) is NaN in a categorical too
+            uniques = np.load(target / f"{i}.values.npy", allow_pickle=True)
+            data[col["name"]] = pd.Series(pd.Categorical.from_codes(values, uniques), copy=False)
+        else:
+            data[col["name"]] = pd.Series(values, dtype=col["dtype"], copy=False)
+
+    return pd.DataFrame(data, copy=False)
+
+
+def _manifest(target):
+    try:
+        return json.loads((Path(target) / MANIFEST).read_text())
+    except (OSError, ValueError):
+        return None
+
+
+def prune_stale(target):
+    """Remove the sibling caches of ``target`` (same stem and sheet) whose workbook is gone.
+
+    Caches without a recorded source (written by an older version or
+    without ``source``) are left alone. Returns the removed directories.
+    """
+    target = Path(target)
+    prefix = target.name.rsplit("--", 1)[0] + "--"
+    removed = []
+    for sibling in target.parent.iterdir():
+        if not sibling.name.startswith(prefix) or sibling == target or ".tmp-" in sibling.name:
+            continue
+        manifest = _manifest(sibling)
+        if manifest is None or "source" not in manifest or Path(manifest["source"]).exists():
+            continue
+        shutil.rmtree(sibling, ignore_errors=True)
+        removed.append(sibling)
+    return removed
+
+
+def file_stamp(path):
+    """``(mtime_ns, size)`` of ``path``; changes whenever the file is replaced."""
+    stat = os.stat(path)
+    return stat.st_mtime_ns, stat.st_size
+
+
+def is_fresh(path, target):
+    """Check whether the cache in ``target`` still matches the workbook at ``path``."""
+    manifest = _manifest(target)
+    if manifest is None or manifest.get("version") != FORMAT_VERSION:
+        return False
+
+    stamp = file_stamp(path)
+    if (manifest.get("mtime_ns"), manifest.get("size")) == stamp:
+        return True
+
+    # the file was touched (e.g. copied again) - only rebuild if the content changed
+    if manifest.get("sha256") != file_hash(path):
+        return False
+    manifest["mtime_ns"], manifest["size"] = stamp
+    (Path(target) / MANIFEST).write_text(json.dumps(manifest))
+    return True
+
+
+def load_workbook(path, sheet_name="Sheet1", cache_dir=CACHE_DIR, use_cache=True):
+    """Read one sheet of an XLSX file, going through the columnar cache."""
+    if not use_cache:
+        with profiling.span("parse xlsx"):
+            return pd.read_excel(io=path, engine="openpyxl", sheet_name=sheet_name)
+
+    target = cache_path(path, sheet_name, cache_dir)
+    if not is_fresh(path, target):
+        with profiling.span("parse xlsx"):
+            df = pd.read_excel(io=path, engine="openpyxl", sheet_name=sheet_name)
+        with profiling.span("write cache"):
+            write_cache(df, target, source=path)
+            prune_stale(target)
+    with profiling.span("read cache"):
+        return read_cache(target)
+
+
+def load_survey(data_dir=DATA_DIR, cache_dir=CACHE_DIR, use_cache=True):
+    """Return the wordplay responses and the task 5 gold selection."""
+    data_dir = Path(data_dir)
+    with profiling.span("excel load"):
+        df = load_workbook(data_dir / RESPONSES_FILE, cache_dir=cache_dir, use_cache=use_cache)
+        task5_selection = load_workbook(data_dir / SELECTION_FILE, cache_dir=cache_dir, use_cache=use_cache)
+    return df, task5_selection
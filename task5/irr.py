@@ -0,0 +1,148 @@
+"""Krippendorff's alpha for nominal data, computed from a coincidence matrix.
+
+Gives the same values as ``simpledorff.calculate_krippendorffs_alpha_for_df``
+(one rating per annotator and unit - the first one -, units with a single
+rating are not pairable) but works on integer-coded NumPy arrays instead of
+pandas groupbys, and adds bootstrap confidence intervals.
+"""
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import NamedTuple
+
+import numpy as np
+import pandas as pd
+
+# bootstrap replicates per task; fixed, so the result does not depend on the pool size
+BOOTSTRAP_CHUNK = 100
+
+
+class AlphaInterval(NamedTuple):
+    alpha: float
+    low: float
+    high: float
+    n_boot: int
+
+
+def encode_ratings(df, experiment_col="WP1", annotator_col="CODE", class_col="WCLASS"):
+    """Integer codes ``(units, values)`` of the ratings plus the number of each."""
+    ratings = df[[experiment_col, annotator_col, class_col]].dropna()
+    ratings = ratings.drop_duplicates(subset=[experiment_col, annotator_col], keep="first")
+    units, unit_labels = pd.factorize(ratings[experiment_col])
+    values, value_labels = pd.factorize(ratings[class_col])
+    return units, values, len(unit_labels), len(value_labels)
+
+
+def value_by_unit(units, values, n_units, n_values, sparse=False):
+    """Counts of each value per unit, restricted to pairable units (two or more ratings).
+
+    With ``sparse=True`` a ``scipy.sparse`` CSR matrix is returned, which keeps
+    memory low for many units and values (e.g. free-text labels).
+    """
+    if sparse:
+        from scipy import sparse as sp
+        counts = sp.csr_matrix((np.ones(len(units)), (units, values)), shape=(n_units, n_values))
+        m = np.asarray(counts.sum(axis=1)).ravel()
+        return counts[m >= 2]
+
+    counts = np.bincount(units * n_values + values, minlength=n_units * n_values)
+    counts = counts.reshape(n_units, n_values).astype(np.float64)
+    return counts[counts.sum(axis=1) >= 2]
+
+
+def unit_disagreement(vbu):
+    """Disagreeing pairs of each pairable unit, weighted by 1/(m_u - 1).
+
+    Together with the value counts (the rows of ``vbu``) alpha is additive over
+    units, which is what makes resampling units cheap.
+    """
+    if hasattr(vbu, "tocsr"):
+        m = np.asarray(vbu.sum(axis=1)).ravel()
+        same = np.asarray(vbu.multiply(vbu).sum(axis=1)).ravel()
+    else:
+        m = vbu.sum(axis=1)
+        same = (vbu * vbu).sum(axis=1)
+    return (m * m - same) / (m - 1)
+
+
+def coincidence_matrix(vbu):
+    """o_ck = sum_u n_uc * (n_uk - [c == k]) / (m_u - 1)"""
+    if hasattr(vbu, "tocsr"):
+        from scipy import sparse as sp
+        m = np.asarray(vbu.sum(axis=1)).ravel()
+        weighted = sp.diags(1 / (m - 1)) @ vbu
+        pairs = (vbu.T @ weighted).toarray()
+        return pairs - np.diag(np.asarray(weighted.sum(axis=0)).ravel())
+
+    m = vbu.sum(axis=1)
+    weighted = vbu / (m - 1)[:, None]
+    return vbu.T @ weighted - np.diag(weighted.sum(axis=0))
+
+
+def alpha_from_coincidences(o):
+    n_c = o.sum(axis=1)
+    n = n_c.sum()
+    expected = n * n - (n_c * n_c).sum()
+    if expected == 0:
+        return float("nan")
+    observed = n - np.trace(o)
+    return float(1 - (n - 1) * observed / expected)
+
+
+def krippendorff_alpha(df, experiment_col="WP1", annotator_col="CODE", class_col="WCLASS", sparse=False):
+    """Krippendorff's alpha (nominal) of the ratings in ``df``."""
+    units, values, n_units, n_values = encode_ratings(df, experiment_col, annotator_col, class_col)
+    vbu = value_by_unit(units, values, n_units, n_values, sparse=sparse)
+    return alpha_from_coincidences(coincidence_matrix(vbu))
+
+
+def _bootstrap_chunk(disagreement, counts, n_boot, seed):
+    rng = np.random.default_rng(seed)
+    n_units = len(disagreement)
+    # bound the (replicates x units) weight matrix to a few million entries
+    batch = max(1, (1 << 22) // n_units)
+    alphas = []
+    for start in range(0, n_boot, batch):
+        # each row of `weights` says how often every unit was drawn in one replicate
+        weights = rng.multinomial(n_units, np.full(n_units, 1 / n_units), size=min(batch, n_boot - start))
+        observed = weights @ disagreement
+        n_c = np.asarray(counts.T @ weights.T).T
+        n = n_c.sum(axis=1)
+        expected = n * n - (n_c * n_c).sum(axis=1)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            alphas.append(1 - (n - 1) * observed / expected)
+    return np.concatenate(alphas)
+
+
+def bootstrap_alpha(df, experiment_col="WP1", annotator_col="CODE", class_col="WCLASS",
+                    n_boot=1000, confidence=0.95, seed=None, processes=None, sparse=False):
+    """Alpha with a percentile confidence interval from resampling the units.
+
+    The replicates are split into chunks of :data:`BOOTSTRAP_CHUNK`, each
+    with its own seed spawned from ``seed``, and the chunks are spread over a
+    process pool (``processes=1`` computes them in this process). The chunks
+    do not depend on the number of processes, so a fixed ``seed`` gives the
+    same interval however the work is spread.
+    """
+    units, values, n_units, n_values = encode_ratings(df, experiment_col, annotator_col, class_col)
+    vbu = value_by_unit(units, values, n_units, n_values, sparse=sparse)
+    alpha = alpha_from_coincidences(coincidence_matrix(vbu))
+    if vbu.shape[0] == 0:
+        return AlphaInterval(alpha, float("nan"), float("nan"), 0)
+
+    disagreement = unit_disagreement(vbu)
+    processes = processes or os.cpu_count() or 1
+    chunks = [min(BOOTSTRAP_CHUNK, n_boot - start) for start in range(0, n_boot, BOOTSTRAP_CHUNK)]
+    seeds = np.random.SeedSequence(seed).spawn(len(chunks))
+
+    if processes == 1 or len(chunks) <= 1:
+        replicates = [_bootstrap_chunk(disagreement, vbu, n, s) for n, s in zip(chunks, seeds)]
+    else:
+        with ProcessPoolExecutor(max_workers=min(processes, len(chunks))) as pool:
+            replicates = list(pool.map(_bootstrap_chunk, [disagreement] * len(chunks),
+                                       [vbu] * len(chunks), chunks, seeds))
+
+    replicates = np.concatenate(replicates) if replicates else np.empty(0)
+    replicates = replicates[np.isfinite(replicates)]
+    tail = (1 - confidence) / 2 * 100
+    low, high = np.percentile(replicates, [tail, 100 - tail]) if len(replicates) else (np.nan, np.nan)
+    return AlphaInterval(alpha, float(low), float(high), len(replicates))
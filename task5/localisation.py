@@ -0,0 +1,149 @@
+"""Pun-word localisation labels, exact and normalized.
+
+*Exact* matching is the historical rule: the gold location lowercased
+against the answer as typed (already lowercased by :mod:`task5.prep`), with
+an unanswered localisation as the label ``"nan"``.
+
+*Normalized* matching first strips punctuation and surplus whitespace and
+then maps every answer token onto a token of the wordplay text: verbatim, by
+a crude suffix stem ("falling" ~ "fall"), or by a small edit distance
+("philatly" ~ "philately"). The gold location goes through the same mapping,
+so two spellings of the same text token end up as the same label. An
+unanswered localisation is :data:`NO_ANSWER`, which no typed answer can
+collide with.
+
+The tokens of every wordplay text are indexed once per selection
+(:class:`TokenIndex`) and each distinct ``(wordplay, answer)`` pair is
+resolved only once, however many ratings or system runs repeat it.
+"""
+import re
+import unicodedata
+
+import numpy as np
+import pandas as pd
+
+from task5.memo import LRUCache
+
+EXACT, NORMALIZED = "exact", "normalized"
+MODES = [EXACT, NORMALIZED]
+
+# columns added by attach_labels: mode -> (gold label, answer label)
+LABEL_COLUMNS = {
+    EXACT: ("location_exact", "WLOC_exact"),
+    NORMALIZED: ("location_normalized", "WLOC_normalized"),
+}
+
+NO_ANSWER = ""
+
+_NON_WORD = re.compile(r"[\W_]+")
+_SUFFIXES = ["ies", "ing", "ed", "es", "ly", "s"]
+
+
+def normalize(text):
+    """Lowercase words separated by single spaces; missing or blank text is :data:`NO_ANSWER`."""
+    if not isinstance(text, str):
+        return NO_ANSWER
+    text = unicodedata.normalize("NFKC", text).lower()
+    return " ".join(_NON_WORD.sub(" ", text).split())
+
+
+def tokenize(text):
+    return normalize(text).split()
+
+
+def stem(token):
+    """Strip one common English suffix; only ever compared with other stems."""
+    for suffix in _SUFFIXES:
+        if token.endswith(suffix) and len(token) - len(suffix) >= 3 and not token.endswith("ss"):
+            token = token[:-len(suffix)] + ("y" if suffix == "ies" else "")
+            # running -> runn -> run, stopped -> stopp -> stop, but falling -> fall
+            if suffix in ("ing", "ed") and len(token) > 3 and token[-1] == token[-2] and token[-1] not in "lsz":
+                token = token[:-1]
+            break
+    return token
+
+
+def max_distance(token):
+    """Typos tolerated in a token of this length."""
+    return 0 if len(token) <= 3 else 1 if len(token) <= 6 else 2
+
+
+def edit_distance(a, b, limit):
+    """Levenshtein distance of ``a`` and ``b``, or ``limit + 1`` once it exceeds ``limit``."""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ca != cb)))
+        if min(current) > limit:
+            return limit + 1
+        previous = current
+    return previous[-1]
+
+
+class TextTokens:
+    """The tokens of one wordplay text, with their stems."""
+
+    def __init__(self, text):
+        self.tokens = list(dict.fromkeys(tokenize(text)))
+        self.token_set = set(self.tokens)
+        self.by_stem = {}
+        for token in self.tokens:
+            self.by_stem.setdefault(stem(token), token)
+
+    def match(self, token):
+        """The text token ``token`` stands for, or ``token`` itself if none is close enough."""
+        if token in self.token_set:
+            return token
+        stemmed = self.by_stem.get(stem(token))
+        if stemmed is not None:
+            return stemmed
+        limit = max_distance(token)
+        best, best_distance = token, limit + 1
+        for candidate in self.tokens:
+            distance = edit_distance(token, candidate, limit)
+            if distance < best_distance:
+                best, best_distance = candidate, distance
+        return best
+
+
+class TokenIndex:
+    """Text tokens of every entry of ``task5_selection``, keyed by wordplay id."""
+
+    def __init__(self, task5_selection, maxsize=100_000):
+        texts = task5_selection.drop_duplicates(subset=["id"]).set_index("id")["text"]
+        self.texts = {wp: TextTokens(text) for wp, text in texts.items()}
+        self.resolved = LRUCache(maxsize)
+
+    def resolve(self, wp, answer):
+        """The normalized label of ``answer`` to wordplay ``wp``."""
+        return self.resolved.get_or_compute((wp, answer), lambda: self._resolve(wp, answer))
+
+    def _resolve(self, wp, answer):
+        tokens = tokenize(answer)
+        text = self.texts.get(wp)
+        if text is None:
+            return " ".join(tokens)
+        return " ".join(text.match(token) for token in tokens)
+
+    def labels(self, wordplays, answers):
+        """Normalized labels for aligned wordplay ids and answers, one resolution per distinct pair."""
+        pairs = pd.MultiIndex.from_arrays([pd.Series(wordplays, dtype=object), pd.Series(answers, dtype=object)])
+        codes, uniques = pd.factorize(pairs)
+        resolved = np.array([self.resolve(wp, answer) for wp, answer in uniques], dtype=object)
+        return resolved[codes]
+
+
+def attach_labels(df, index):
+    """Add both label pairs of :data:`LABEL_COLUMNS` to prepared responses."""
+    gold, answer = LABEL_COLUMNS[EXACT]
+    norm_gold, norm_answer = LABEL_COLUMNS[NORMALIZED]
+    wordplays = df["WP1"].to_numpy()
+    return df.assign(**{
+        gold: df["location"].str.lower().fillna("nan"),
+        answer: df["WLOC"].fillna("nan"),
+        norm_gold: index.labels(wordplays, df["location"].to_numpy()),
+        norm_answer: index.labels(wordplays, df["WLOC"].to_numpy()),
+    })
@@ -0,0 +1,164 @@
+"""Classification scores derived from one confusion matrix.
+
+The labels are integer-coded once, the confusion matrix is a single
+``np.bincount`` and F1, precision, recall and accuracy are all read off it.
+The definitions follow scikit-learn (``average="binary"`` with a positive
+label, or ``average="macro"`` over the labels present in either column;
+undefined ratios count as 0).
+
+Macro averages only need per-label counts (true, predicted, correct), so
+they come from three ``np.bincount`` calls of length L instead of an L x L
+matrix; free-text localisation answers can have tens of thousands of
+labels. Binary scores keep the small confusion matrix.
+
+Grouped counts are one more ``np.bincount`` over ``(group, ...)``, so
+per-group breakdowns are a single pass too.
+"""
+import numpy as np
+import pandas as pd
+
+SCORES = ["f1", "precision", "recall", "accuracy"]
+
+
+def encode_labels(y_true, y_pred):
+    """Codes of both columns over their shared label set.
+
+    Returns ``(true_codes, pred_codes, labels, keep)``; rows without a true
+    label cannot be scored and are dropped (``keep`` marks the kept rows). A
+    missing prediction is a label of its own.
+    """
+    y_true = pd.Series(y_true).reset_index(drop=True)
+    y_pred = pd.Series(y_pred).reset_index(drop=True)
+    keep = y_true.notna().to_numpy()
+
+    codes, labels = pd.factorize(pd.concat([y_true[keep], y_pred[keep]], ignore_index=True), use_na_sentinel=False)
+    n = int(keep.sum())
+    return codes[:n], codes[n:], labels, keep
+
+
+def confusion_matrix(true_codes, pred_codes, n_labels):
+    """Rows are true labels, columns predicted labels."""
+    counts = np.bincount(true_codes * n_labels + pred_codes, minlength=n_labels * n_labels)
+    return counts.reshape(n_labels, n_labels)
+
+
+def grouped_confusion_matrices(group_codes, true_codes, pred_codes, n_groups, n_labels):
+    """One confusion matrix per group, shape ``(n_groups, n_labels, n_labels)``.
+
+    Dense, so only for few labels (binary scores); macro averages use
+    :func:`grouped_label_counts`.
+    """
+    flat = (group_codes * n_labels + true_codes) * n_labels + pred_codes
+    counts = np.bincount(flat, minlength=n_groups * n_labels * n_labels)
+    return counts.reshape(n_groups, n_labels, n_labels)
+
+
+def label_counts(true_codes, pred_codes, n_labels):
+    """Per-label ``(correct, true, predicted)`` counts, each of length ``n_labels``."""
+    tp = np.bincount(true_codes[true_codes == pred_codes], minlength=n_labels)
+    return tp, np.bincount(true_codes, minlength=n_labels), np.bincount(pred_codes, minlength=n_labels)
+
+
+def grouped_label_counts(group_codes, true_codes, pred_codes, n_groups, n_labels):
+    """:func:`label_counts` per group, each of shape ``(n_groups, n_labels)``."""
+    size = n_groups * n_labels
+    true_flat = group_codes * n_labels + true_codes
+    pred_flat = group_codes * n_labels + pred_codes
+    tp = np.bincount(true_flat[true_codes == pred_codes], minlength=size)
+    return tuple(c.reshape(n_groups, n_labels) for c in
+                 (tp, np.bincount(true_flat, minlength=size), np.bincount(pred_flat, minlength=size)))
+
+
+def _ratio(num, den):
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(den > 0, num / np.where(den > 0, den, 1), 0.0)
+
+
+def scores_from_confusion(cm, average="binary", pos=None):
+    """F1, precision, recall and accuracy of one or a stack of confusion matrices.
+
+    ``pos`` is the code of the positive label for ``average="binary"``. For a
+    stack (leading group axis) every score is an array with one entry per group.
+    """
+    cm = np.asarray(cm)
+    return scores_from_label_counts(np.diagonal(cm, axis1=-2, axis2=-1), cm.sum(axis=-1), cm.sum(axis=-2),
+                                    average, pos)
+
+
+def scores_from_label_counts(tp, true_count, pred_count, average="binary", pos=None):
+    """The four scores from per-label counts (see :func:`label_counts`), last axis = labels."""
+    tp, true_count, pred_count = np.asarray(tp), np.asarray(true_count), np.asarray(pred_count)
+    total = true_count.sum(axis=-1)
+    accuracy = _ratio(tp.sum(axis=-1), total)
+
+    if average == "binary":
+        tp, true_count, pred_count = tp[..., pos], true_count[..., pos], pred_count[..., pos]
+        precision = _ratio(tp, pred_count)
+        recall = _ratio(tp, true_count)
+        f1 = _ratio(2 * tp, true_count + pred_count)
+    elif average == "macro":
+        # only labels occurring in the (group's) true or predicted column take part
+        present = (true_count + pred_count) > 0
+        n_present = present.sum(axis=-1)
+        precision = _ratio((_ratio(tp, pred_count) * present).sum(axis=-1), n_present)
+        recall = _ratio((_ratio(tp, true_count) * present).sum(axis=-1), n_present)
+        f1 = _ratio((_ratio(2 * tp, true_count + pred_count) * present).sum(axis=-1), n_present)
+    else:
+        raise ValueError(f"unsupported average: {average!r}")
+    return {"f1": f1, "precision": precision, "recall": recall, "accuracy": accuracy}
+
+
+def _positive_code(labels, pos_label):
+    matches = np.flatnonzero(pd.Index(labels) == pos_label)
+    return int(matches[0]) if len(matches) else len(labels)
+
+
+def scores(y_true, y_pred, average="binary", pos_label="yes"):
+    """All four scores of ``y_pred`` against ``y_true`` from one confusion matrix."""
+    true_codes, pred_codes, labels, _ = encode_labels(y_true, y_pred)
+    n_labels = len(labels) + 1  # one spare slot, so an absent positive label scores 0
+    if average == "binary":
+        cm = confusion_matrix(true_codes, pred_codes, n_labels)
+        result = scores_from_confusion(cm, average, _positive_code(labels, pos_label))
+    else:
+        result = scores_from_label_counts(*label_counts(true_codes, pred_codes, n_labels), average)
+    return {name: float(value) for name, value in result.items()}
+
+
+def grouped_scores(y_true, y_pred, groups, average="binary", pos_label="yes"):
+    """The four scores per group, as a frame indexed by group with a ``support`` column."""
+    true_codes, pred_codes, labels, keep = encode_labels(y_true, y_pred)
+    group_codes, group_labels = pd.factorize(pd.Series(groups).reset_index(drop=True)[keep], sort=True)
+    present = group_codes >= 0  # rows without a group are left out
+
+    n_labels = len(labels) + 1
+    args = (group_codes[present], true_codes[present], pred_codes[present], len(group_labels), n_labels)
+    if average == "binary":
+        cms = grouped_confusion_matrices(*args)
+        counts = (np.diagonal(cms, axis1=-2, axis2=-1), cms.sum(axis=-1), cms.sum(axis=-2))
+        pos = _positive_code(labels, pos_label)
+    else:
+        counts, pos = grouped_label_counts(*args), None
+
+    result = pd.DataFrame(scores_from_label_counts(*counts, average, pos), index=group_labels)
+    result["support"] = counts[1].sum(axis=-1)
+    return result
+
+
+def scores_from_counts(pair_counts, average="binary", pos_label="yes"):
+    """The four scores from a mapping ``(true, predicted) -> count``.
+
+    Used where the confusion counts are kept up to date instead of the rows.
+    """
+    labels = pd.Index(sorted({label for pair in pair_counts for label in pair}, key=str))
+    n_labels = len(labels) + 1
+    tp, true_count, pred_count = (np.zeros(n_labels, dtype=np.int64) for _ in range(3))
+    for (true, pred), count in pair_counts.items():
+        t, p = labels.get_loc(true), labels.get_loc(pred)
+        true_count[t] += count
+        pred_count[p] += count
+        if t == p:
+            tp[t] += count
+    pos = _positive_code(labels, pos_label) if average == "binary" else None
+    result = scores_from_label_counts(tp, true_count, pred_count, average, pos)
+    return {name: float(value) for name, value in result.items()}
@@ -0,0 +1,167 @@
+"""Loading, filtering and evaluation of the survey responses.
+
+Everything the dashboard shows for one sidebar setting is computed by
+:func:`evaluate`, so the result can be memoized per :class:`Filters` value.
+Nothing here depends on Streamlit, Altair or scikit-learn; the command line
+(``python -m task5``) uses the same functions.
+"""
+from typing import NamedTuple
+
+import numpy as np
+import pandas as pd
+
+from task5 import charts, ingest, irr, localisation, metrics, prep, profiling
+from task5.filters import FilterIndex
+
+# columns charted per participant and per rated wordplay
+USER_CHARTS = ["PLANG", "PORG", "PAGE", "PENGEXP"]
+WORDPLAY_CHARTS = ["WUNDER", "WKNOWN", "WFUNNY", "WOFFENS", "WLIFE"]
+
+# upper bounds (inclusive, whole years) of the bands used for breakdowns and sweeps
+AGE_BANDS = [20, 25, 30, 40, 60]
+EXPERIENCE_BANDS = [5, 10, 15, 20]
+
+# bootstrap replicates for the IRR confidence interval; small enough to run in-process
+IRR_BOOTSTRAP = 1000
+
+
+class Filters(NamedTuple):
+    """A normalized sidebar selection, usable as a cache key."""
+    complete: bool
+    age: tuple
+    experience: tuple
+    first_lang: tuple
+
+    @classmethod
+    def normalize(cls, complete, age, experience, first_lang):
+        return cls(
+            complete=bool(complete),
+            age=(int(age[0]), int(age[1])),
+            experience=(int(experience[0]), int(experience[1])),
+            first_lang=tuple(sorted(str(lang) for lang in first_lang)),
+        )
+
+    @classmethod
+    def everything(cls, df):
+        """The sidebar defaults: all ages, experience levels and first languages."""
+        return cls.normalize(
+            False,
+            (df["PAGE"].min(), df["PAGE"].max()),
+            (df["PENGEXP"].min(), df["PENGEXP"].max()),
+            df["PLANG"].dropna().unique(),
+        )
+
+
+def load(data_dir=ingest.DATA_DIR, use_cache=True):
+    """The prepared responses, the gold selection and the rated ids missing from it."""
+    df, task5_selection = ingest.load_survey(data_dir, use_cache=use_cache)
+    with profiling.span("prep"):
+        missing_gold = prep.missing_gold_ids(df, task5_selection)
+        df = prep.prepare_responses(df, task5_selection)
+    return df, task5_selection, missing_gold
+
+
+def band_labels(bands):
+    labels = [f"<= {bands[0]}"]
+    labels += [f"{lo + 1}-{hi}" for lo, hi in zip(bands, bands[1:])]
+    labels += [f"> {bands[-1]}"]
+    return labels
+
+
+def band_ranges(bands, low, high):
+    """``(label, (from, to))`` per band, with the outer bands closed at ``low``/``high``."""
+    bounds = [low - 1, *bands, high]
+    return [(label, (lo + 1, hi)) for label, lo, hi in zip(band_labels(bands), bounds, bounds[1:])]
+
+
+def age_band(age):
+    edges = [-float("inf"), *AGE_BANDS, float("inf")]
+    return pd.cut(age, edges, labels=band_labels(AGE_BANDS))
+
+
+def location_labels(df, mode=localisation.EXACT):
+    """Gold and answered pun words as labels, precomputed by :func:`prep.prepare_responses`."""
+    gold, answer = localisation.LABEL_COLUMNS[mode]
+    return df[gold], df[answer]
+
+
+def classification_scores(df):
+    return metrics.scores(df["class"], df["WCLASS"], average="binary", pos_label="yes")
+
+
+def location_scores(df, mode=localisation.EXACT):
+    location, answer = location_labels(df, mode)
+    return metrics.scores(location, answer, average="macro")
+
+
+def breakdowns(df):
+    """Classification scores per first language, age band and wordplay."""
+    groups = {"First language": df["PLANG"], "Age band": age_band(df["PAGE"]), "Wordplay": df["WP1"]}
+    return {name: metrics.grouped_scores(df["class"], df["WCLASS"], by, average="binary", pos_label="yes")
+            for name, by in groups.items()}
+
+
+def inter_rater_reliability(df, n_boot=IRR_BOOTSTRAP, processes=1):
+    return irr.bootstrap_alpha(df, experiment_col="WP1", annotator_col="CODE", class_col="WCLASS",
+                               n_boot=n_boot, seed=0, processes=processes)
+
+
+def evaluate(df, filters, n_boot=IRR_BOOTSTRAP, processes=1, index=None):
+    """All counts, chart tallies, metrics and the IRR for one filter setting.
+
+    ``index`` is the :class:`~task5.filters.FilterIndex` of ``df``; pass it
+    when evaluating the same frame repeatedly. The filtered ratings and
+    participants are kept as row positions (``rows``, ``user_rows``) rather
+    than frames, so memoized results stay small; slice ``df.iloc`` with them.
+    """
+    with profiling.span("filtering"):
+        index = index if index is not None else FilterIndex(df)
+        mask = index.mask(filters)
+        rows, user_rows = np.flatnonzero(mask), index.user_rows(mask)
+        df_users = df.iloc[user_rows]
+        df = df.iloc[rows]
+        results = {
+            "filters": filters,
+            "rows": rows,
+            "user_rows": user_rows,
+            "count_ratings": len(rows),
+            "english_experience": float(df_users["PENGEXP"].sum()),
+            "count_resp": index.count_responses(mask),
+            "count_users": index.count_users(mask),
+        }
+
+    with profiling.span("tallies"):
+        results["user_counts"] = charts.tallies(df_users, USER_CHARTS)
+        results["wordplay_counts"] = charts.tallies(df, WORDPLAY_CHARTS)
+
+    with profiling.span("metrics"):
+        results["classification"] = classification_scores(df)
+        results["location"] = location_scores(df)
+        results["location_normalized"] = location_scores(df, localisation.NORMALIZED)
+        results["breakdowns"] = breakdowns(df)
+
+    with profiling.span("alpha"):
+        results["irr"] = inter_rater_reliability(df, n_boot=n_boot, processes=processes)
+    return results
+
+
+def summary(results, with_breakdowns=False):
+    """The plain-data part of :func:`evaluate`'s results, ready for JSON."""
+    irr_result = results["irr"]
+    record = {
+        "filters": results["filters"]._asdict(),
+        "count_ratings": results["count_ratings"],
+        "count_resp": results["count_resp"],
+        "count_users": results["count_users"],
+        "english_experience": results["english_experience"],
+        "classification": results["classification"],
+        "location": results["location"],
+        "location_normalized": results["location_normalized"],
+        "irr": irr_result._asdict(),
+    }
+    if with_breakdowns:
+        record["breakdowns"] = {
+            name: frame.reset_index(names="group").to_dict(orient="records")
+            for name, frame in results["breakdowns"].items()
+        }
+    return record
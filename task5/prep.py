@@ -0,0 +1,68 @@
+"""Preparation of the raw survey responses."""
+import numpy as np
+import pandas as pd
+
+from task5 import localisation, profiling
+
+# gold column in task5_selection -> column added to the responses
+GOLD_COLUMNS = {"wordplay": "class", "location": "location"}
+
+CATEGORICAL_COLUMNS = ["PLANG", "PORG", "CODE"]
+LOWERCASE_COLUMNS = ["WCLASS", "WLOC"]
+
+
+def gold_index(task5_selection, columns=GOLD_COLUMNS):
+    """The gold selection keyed by wordplay id (first entry wins, like the old lookup)."""
+    gold = task5_selection.drop_duplicates(subset=["id"]).set_index("id")
+    return gold[list(columns)].rename(columns=columns)
+
+
+def missing_gold_ids(df, task5_selection):
+    """Sorted wordplay ids rated in ``df`` without an entry in ``task5_selection``."""
+    rated = pd.Index(pd.unique(df["WP1"].dropna()))
+    return sorted(rated[~rated.isin(task5_selection["id"])].tolist())
+
+
+def attach_gold(df, task5_selection, columns=GOLD_COLUMNS):
+    """Add the gold standard of every rated wordplay to ``df`` in one indexed join.
+
+    Rows whose ``WP1`` is missing from the selection get NaN gold values;
+    :func:`missing_gold_ids` names those ids.
+    """
+    gold = gold_index(task5_selection, columns)
+    aligned = gold.reindex(df["WP1"].to_numpy())
+    return df.assign(**{col: aligned[col].to_numpy() for col in aligned.columns})
+
+
+def english_experience(df):
+    """Years of English experience; native speakers count their age, unanswered means 0."""
+    return pd.Series(
+        np.where(df["PLANG"] == "English", df["PAGE"], df["PENGEXP"].fillna(0)),
+        index=df.index,
+        dtype="float64",
+    )
+
+
+def participant_features(df):
+    """Derive all participant features column-wise, without per-row Python calls."""
+    features = {"PENGEXP": english_experience(df)}
+    for col in LOWERCASE_COLUMNS:
+        features[col] = df[col].str.lower()
+    for col in CATEGORICAL_COLUMNS:
+        features[col] = df[col].astype("category")
+    return df.assign(**features)
+
+
+def prepare_responses(df, task5_selection, tokens=None):
+    """Full preparation of the raw responses: gold standard, participant features and localisation labels.
+
+    ``tokens`` is the :class:`~task5.localisation.TokenIndex` of
+    ``task5_selection``; pass it when preparing batch after batch.
+    """
+    with profiling.span("gold join"):
+        df = attach_gold(df, task5_selection)
+    with profiling.span("participant features"):
+        df = participant_features(df)
+    with profiling.span("localisation labels"):
+        tokens = tokens if tokens is not None else localisation.TokenIndex(task5_selection)
+        return localisation.attach_labels(df, tokens)
@@ -0,0 +1,151 @@
+"""Named timing and memory spans around the pipeline stages.
+
+Stages mark themselves with ``with profiling.span("metrics"):``. Unless a
+:class:`Profiler` is active in the current context that is all a span does,
+so the marks stay in the code for good. An active profiler records per span
+the wall time and the process's peak RSS at its end. With
+``trace_memory=True`` it also records the bytes allocated and the allocation
+peak over the span (``None`` otherwise). That uses ``tracemalloc``, which
+slows everything down and counts every thread, so keep it for debugging
+sessions.
+
+Spans nest; every record carries the path of its enclosing spans. Import
+cost is measured separately, in a fresh interpreter (:func:`import_times`).
+"""
+import contextvars
+import json
+import subprocess
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
+from typing import NamedTuple, Optional
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# modules whose cold import the dashboard pays for on startup
+DASHBOARD_IMPORTS = ["numpy", "pandas", "altair", "streamlit", "task5.pipeline"]
+
+_active = contextvars.ContextVar("task5_profiler", default=None)
+
+
+class Span(NamedTuple):
+    name: str
+    path: str
+    depth: int
+    start: float
+    seconds: float
+    max_rss: int
+    allocated: Optional[int]
+    peak: Optional[int]
+
+
+def max_rss():
+    """Peak resident set size of this process in bytes, or 0 where unknown."""
+    if resource is None:
+        return 0
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss if sys.platform == "darwin" else rss * 1024
+
+
+class Profiler:
+    """Collects the spans entered while it is active (``with Profiler() as p:``)."""
+
+    def __init__(self, trace_memory=False):
+        self.trace_memory = trace_memory
+        self.spans = []
+        self._stack = []
+        self._token = None
+        self._tracing = False
+        self._origin = time.perf_counter()
+
+    def start(self):
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._tracing = True
+        self._token = _active.set(self)
+        return self
+
+    def stop(self):
+        if self._token is not None:
+            _active.reset(self._token)
+            self._token = None
+        if self._tracing:
+            tracemalloc.stop()
+            self._tracing = False
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    @contextmanager
+    def span(self, name):
+        tracing = self.trace_memory and tracemalloc.is_tracing()
+        frame = {"name": name, "mem": 0, "peak": 0}
+        if tracing:
+            # fold the peak so far into the open spans before resetting it for this one
+            current, peak = tracemalloc.get_traced_memory()
+            for outer in self._stack:
+                outer["peak"] = max(outer["peak"], peak)
+            tracemalloc.reset_peak()
+            frame["mem"] = frame["peak"] = current
+
+        path = "/".join([f["name"] for f in self._stack] + [name])
+        depth = len(self._stack)
+        self._stack.append(frame)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - start
+            self._stack.pop()
+            allocated = peak = None
+            if tracing and tracemalloc.is_tracing():
+                current, traced_peak = tracemalloc.get_traced_memory()
+                frame["peak"] = max(frame["peak"], traced_peak)
+                allocated, peak = current - frame["mem"], frame["peak"] - frame["mem"]
+                if self._stack:
+                    self._stack[-1]["peak"] = max(self._stack[-1]["peak"], frame["peak"])
+            self.spans.append(Span(name, path, depth, start - self._origin, seconds, max_rss(), allocated, peak))
+
+    def records(self):
+        """The spans in the order they were entered, as plain dicts."""
+        return [span._asdict() for span in sorted(self.spans, key=lambda s: s.start)]
+
+    def to_json(self, **extra):
+        return json.dumps({"trace_memory": self.trace_memory, "spans": self.records(), **extra}, indent=2)
+
+
+@contextmanager
+def span(name):
+    """Record a span named ``name`` if a profiler is active, else do nothing."""
+    profiler = _active.get()
+    if profiler is None:
+        yield
+        return
+    with profiler.span(name):
+        yield
+
+
+def import_times(modules=DASHBOARD_IMPORTS, python=sys.executable):
+    """Cold import cost of ``modules``, one after the other, in a fresh interpreter.
+
+    Returns ``[{"module", "self_s", "cumulative_s"}]`` from ``python -X importtime``;
+    a module already pulled in by an earlier one shows only its remaining cost.
+    """
+    code = "; ".join(f"import {module}" for module in modules)
+    result = subprocess.run([python, "-X", "importtime", "-c", code], capture_output=True, text=True, check=True)
+
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        own, cumulative, name = line[len("import time:"):].split("|")
+        if name.strip() in modules and own.strip().isdigit():
+            times[name.strip()] = {"module": name.strip(), "self_s": int(own) / 1e6, "cumulative_s": int(cumulative) / 1e6}
+    return [times.get(module, {"module": module, "self_s": 0.0, "cumulative_s": 0.0}) for module in modules]
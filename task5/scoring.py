@@ -0,0 +1,171 @@
+"""Streaming comparison of JOKER system runs with the human ratings.
+
+Prediction files (JSONL or CSV, one prediction per line with ``run_id``,
+``id``, ``class`` and ``location``) are read in chunks. Every chunk is joined
+against the gold selection and folded into per-run confusion counts, so
+memory stays bounded by the number of runs and labels, not by the size of
+the files. At the end each run is reported next to the human raters on the
+same wordplays.
+"""
+from collections import Counter, defaultdict
+from pathlib import Path
+
+import pandas as pd
+
+from task5 import localisation, metrics, pipeline, prep
+
+RUN_COL, ID_COL, CLASS_COL, LOCATION_COL = "run_id", "id", "class", "location"
+CHUNKSIZE = 100_000
+
+# spellings of the binary decision accepted from system output
+CLASS_VALUES = {"yes": "yes", "no": "no", "1": "yes", "0": "no", "true": "yes", "false": "no",
+                "1.0": "yes", "0.0": "no"}
+
+
+def read_predictions(path, chunksize=CHUNKSIZE):
+    """Chunks of a ``.jsonl``/``.ndjson``/``.json`` (one object per line) or ``.csv`` file."""
+    path = Path(path)
+    if path.suffix in (".jsonl", ".ndjson", ".json"):
+        reader = pd.read_json(path, lines=True, chunksize=chunksize, dtype=False)
+    else:
+        reader = pd.read_csv(path, chunksize=chunksize, dtype={RUN_COL: str, CLASS_COL: str, LOCATION_COL: str})
+    with reader:
+        yield from reader
+
+
+def normalize_predictions(chunk):
+    classes = chunk[CLASS_COL].astype(str).str.strip().str.lower()
+    answers = chunk[LOCATION_COL] if LOCATION_COL in chunk else pd.Series(None, index=chunk.index, dtype=object)
+    return pd.DataFrame({
+        RUN_COL: chunk[RUN_COL].astype(str),
+        ID_COL: pd.to_numeric(chunk[ID_COL], errors="coerce"),
+        "pred_class": classes.map(CLASS_VALUES),
+        "pred_location": answers.astype("str").str.strip().str.lower().fillna("nan"),
+        "answer": answers,
+    })
+
+
+class HumanReference:
+    """Per-wordplay confusion counts of the human raters, to be summed over any set of wordplays."""
+
+    def __init__(self, df):
+        location, answer = pipeline.location_labels(df)
+        location_normalized, answer_normalized = pipeline.location_labels(df, localisation.NORMALIZED)
+        ratings = pd.DataFrame({"wp": df["WP1"].to_numpy(), "gold": df["class"].to_numpy(),
+                                "human": df["WCLASS"].to_numpy(), "location": location.to_numpy(),
+                                "answer": answer.to_numpy(),
+                                "location_normalized": location_normalized.to_numpy(),
+                                "answer_normalized": answer_normalized.to_numpy()})
+
+        self.class_counts = defaultdict(Counter)
+        for (wp, gold, human), n in ratings.dropna(subset=["gold", "human"]).groupby(["wp", "gold", "human"]).size().items():
+            self.class_counts[wp][gold, human] += n
+        self.location_counts = defaultdict(Counter)
+        for (wp, gold, human), n in ratings.groupby(["wp", "location", "answer"]).size().items():
+            self.location_counts[wp][gold, human] += n
+        self.normalized_counts = defaultdict(Counter)
+        for (wp, gold, human), n in ratings.groupby(["wp", "location_normalized", "answer_normalized"]).size().items():
+            self.normalized_counts[wp][gold, human] += n
+
+        # the raters' majority vote; ties go to "yes"
+        votes = ratings.dropna(subset=["human"]).groupby(["wp", "human"]).size().unstack(fill_value=0)
+        yes = votes["yes"] if "yes" in votes else 0
+        no = votes["no"] if "no" in votes else 0
+        self.majority = pd.Series(["yes" if y >= n else "no" for y, n in zip(yes, no)], index=votes.index)
+
+    def counts(self, wordplays):
+        class_counts, location_counts, normalized_counts = Counter(), Counter(), Counter()
+        for wp in wordplays:
+            class_counts.update(self.class_counts.get(wp, {}))
+            location_counts.update(self.location_counts.get(wp, {}))
+            normalized_counts.update(self.normalized_counts.get(wp, {}))
+        return class_counts, location_counts, normalized_counts
+
+
+class RunTotals:
+    def __init__(self):
+        self.predictions = 0
+        self.class_counts = Counter()
+        self.location_counts = Counter()
+        self.normalized_counts = Counter()
+        self.agreement = Counter()
+        self.wordplays = set()
+
+
+def score_runs(paths, task5_selection, df, chunksize=CHUNKSIZE):
+    """One row per run: system vs. gold, humans vs. gold on the same wordplays, and system-human agreement.
+
+    ``df`` are the prepared human ratings (see :func:`pipeline.load`).
+    Localisation is scored with exact and with normalized matching
+    (see :mod:`task5.localisation`).
+    """
+    gold = prep.gold_index(task5_selection)
+    gold_location = gold["location"].str.lower().fillna("nan")
+    tokens = localisation.TokenIndex(task5_selection)
+    gold_normalized = pd.Series(tokens.labels(gold.index, gold["location"]), index=gold.index)
+    humans = HumanReference(df[df["lastpage"] != 0])
+
+    runs = defaultdict(RunTotals)
+    skipped = Counter()
+    for path in paths:
+        for chunk in read_predictions(path, chunksize):
+            chunk = normalize_predictions(chunk)
+            in_gold = chunk[ID_COL].isin(gold.index)
+            for run, n in chunk.loc[~in_gold, RUN_COL].value_counts().items():
+                skipped[run] += n
+            chunk = chunk[in_gold]
+            if chunk.empty:
+                continue
+
+            ids = chunk[ID_COL].to_numpy()
+            chunk = chunk.assign(
+                gold_class=gold["class"].reindex(ids).to_numpy(),
+                gold_location=gold_location.reindex(ids).to_numpy(),
+                gold_normalized=gold_normalized.reindex(ids).to_numpy(),
+                pred_normalized=tokens.labels(ids, chunk["answer"].to_numpy()),
+                human_majority=humans.majority.reindex(ids).to_numpy(),
+            )
+            for run, rows in chunk.groupby(RUN_COL, sort=False):
+                totals = runs[run]
+                totals.predictions += len(rows)
+                totals.wordplays.update(rows[ID_COL].unique().tolist())
+                totals.class_counts.update(rows.groupby(["gold_class", "pred_class"], dropna=False).size().to_dict())
+                totals.location_counts.update(rows.groupby(["gold_location", "pred_location"]).size().to_dict())
+                totals.normalized_counts.update(rows.groupby(["gold_normalized", "pred_normalized"]).size().to_dict())
+                rated = rows["human_majority"].notna()
+                totals.agreement["agree"] += int((rows.loc[rated, "pred_class"] == rows.loc[rated, "human_majority"]).sum())
+                totals.agreement["total"] += int(rated.sum())
+
+    table = []
+    for run, totals in runs.items():
+        human_class, human_location, human_normalized = humans.counts(totals.wordplays)
+        row = {"run_id": run, "predictions": totals.predictions, "skipped": skipped.pop(run, 0),
+               "wordplays": len(totals.wordplays)}
+        for prefix, counts, average in [("model_class", totals.class_counts, "binary"),
+                                        ("human_class", human_class, "binary"),
+                                        ("model_location", totals.location_counts, "macro"),
+                                        ("human_location", human_location, "macro"),
+                                        ("model_location_normalized", totals.normalized_counts, "macro"),
+                                        ("human_location_normalized", human_normalized, "macro")]:
+            scores = metrics.scores_from_counts(_without_missing(counts), average=average, pos_label="yes")
+            row.update({f"{prefix}_{name}": value for name, value in scores.items()})
+        total = totals.agreement["total"]
+        row["human_agreement"] = totals.agreement["agree"] / total if total else float("nan")
+        table.append(row)
+
+    # runs whose predictions all missed the gold selection
+    for run, n in skipped.items():
+        table.append({"run_id": run, "predictions": 0, "skipped": n, "wordplays": 0})
+
+    table = pd.DataFrame(table)
+    if "model_class_f1" in table:
+        table = table.sort_values("model_class_f1", ascending=False, kind="stable")
+    return table.reset_index(drop=True)
+
+
+def _without_missing(counts):
+    """Drop pairs without a gold label; an unreadable prediction stays, as the label ``None``.
+
+    NaN keys would not compare equal to each other, hence the ``None``.
+    """
+    return Counter({(t, None if pd.isna(p) else p): n for (t, p), n in counts.items() if not pd.isna(t)})
@@ -0,0 +1,215 @@
+"""Human performance across every demographic slice, in parallel.
+
+The grid is every combination of first language, age band, experience band
+and complete/all responses (each dimension also has an "all" entry). The
+responses are encoded once into integer and float arrays which are placed in
+shared memory; pool workers attach to them instead of receiving pickled
+frames and evaluate their share of the grid with the same confusion-matrix
+and coincidence-matrix code as the dashboard.
+
+Finished slices are appended to a CSV checkpoint as they come in, and a
+restarted sweep skips every slice already in it.
+"""
+import csv
+import itertools
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import shared_memory
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from task5 import irr, metrics, pipeline
+from task5.filters import COMPLETE_PAGE
+
+ALL = "all"
+KEY_COLUMNS = ["first_lang", "age_band", "experience_band", "complete"]
+SCORE_COLUMNS = (["ratings", "responses", "participants"]
+                 + [f"class_{s}" for s in metrics.SCORES]
+                 + [f"location_{s}" for s in metrics.SCORES]
+                 + ["alpha"])
+
+# worker-side views onto the shared arrays, set up by _attach
+_arrays = {}
+_segments = []
+
+
+def grid(df):
+    """All slices as ``{key columns..., "filters": Filters}`` dicts."""
+    defaults = pipeline.Filters.everything(df)
+    langs = [(ALL, defaults.first_lang)] + [(lang, (lang,)) for lang in defaults.first_lang]
+    ages = [(ALL, defaults.age)] + pipeline.band_ranges(pipeline.AGE_BANDS, *defaults.age)
+    exps = [(ALL, defaults.experience)] + pipeline.band_ranges(pipeline.EXPERIENCE_BANDS, *defaults.experience)
+
+    for (lang, first_lang), (age, age_range), (exp, exp_range), complete in itertools.product(
+            langs, ages, exps, [False, True]):
+        yield {
+            "first_lang": lang, "age_band": age, "experience_band": exp, "complete": complete,
+            "filters": pipeline.Filters.normalize(complete, age_range, exp_range, first_lang),
+        }
+
+
+def encode(df):
+    """The columns the sweep needs, as plain NumPy arrays plus the label lookups."""
+    arrays = {
+        "lastpage": df["lastpage"].to_numpy(dtype=np.int64),
+        "age": df["PAGE"].to_numpy(dtype=np.float64),
+        "experience": df["PENGEXP"].to_numpy(dtype=np.float64),
+    }
+    lang_codes, langs = pd.factorize(df["PLANG"])
+    arrays["lang"] = lang_codes.astype(np.int64)
+    arrays["response"] = pd.factorize(df["id"], use_na_sentinel=False)[0].astype(np.int64)
+    arrays["user"] = pd.factorize(df["CODE"], use_na_sentinel=False)[0].astype(np.int64)
+
+    # -1 marks rows that cannot be scored (no gold standard / no rating)
+    true, pred, class_labels, keep = metrics.encode_labels(df["class"], df["WCLASS"])
+    arrays["class_true"] = np.full(len(df), -1, dtype=np.int64)
+    arrays["class_pred"] = np.full(len(df), -1, dtype=np.int64)
+    arrays["class_true"][keep], arrays["class_pred"][keep] = true, pred
+
+    true, pred, location_labels, _ = metrics.encode_labels(*pipeline.location_labels(df))
+    arrays["location_true"], arrays["location_pred"] = true.astype(np.int64), pred.astype(np.int64)
+
+    # Krippendorff's alpha ignores ratings without wordplay, participant code or answer (-1)
+    arrays["unit"] = pd.factorize(df["WP1"])[0].astype(np.int64)
+    arrays["annotator"] = pd.factorize(df["CODE"])[0].astype(np.int64)
+    arrays["rating"] = pd.factorize(df["WCLASS"])[0].astype(np.int64)
+
+    lookups = {
+        "langs": [str(lang) for lang in langs],
+        "n_class": len(class_labels) + 1,
+        "pos": int(np.flatnonzero(pd.Index(class_labels) == "yes")[0]) if "yes" in set(class_labels) else len(class_labels),
+        "n_location": len(location_labels),
+        "n_units": int(arrays["unit"].max()) + 1 if len(df) else 0,
+        "n_ratings": int(arrays["rating"].max()) + 1 if len(df) else 0,
+        "n_users": int(arrays["user"].max()) + 1 if len(df) else 0,
+        "n_responses": int(arrays["response"].max()) + 1 if len(df) else 0,
+    }
+    return arrays, lookups
+
+
+def share(arrays):
+    """Copy ``arrays`` into shared memory; returns the segments and a picklable layout."""
+    segments, layout = [], {}
+    for name, values in arrays.items():
+        segment = shared_memory.SharedMemory(create=True, size=max(1, values.nbytes))
+        np.ndarray(values.shape, values.dtype, buffer=segment.buf)[:] = values
+        segments.append(segment)
+        layout[name] = (segment.name, values.dtype.str, values.shape)
+    return segments, layout
+
+
+def _attach(layout, lookups):
+    for name, (segment_name, dtype, shape) in layout.items():
+        segment = shared_memory.SharedMemory(name=segment_name)
+        _segments.append(segment)
+        _arrays[name] = np.ndarray(shape, np.dtype(dtype), buffer=segment.buf)
+    _arrays["lookups"] = lookups
+
+
+def _mask(a, filters):
+    lookups = a["lookups"]
+    mask = (a["lastpage"] == COMPLETE_PAGE) if filters.complete else (a["lastpage"] != 0)
+    lang_codes = [lookups["langs"].index(lang) for lang in filters.first_lang if lang in lookups["langs"]]
+    mask &= np.isin(a["lang"], lang_codes)
+    mask &= (a["age"] >= filters.age[0]) & (a["age"] <= filters.age[1])
+    mask &= (a["experience"] >= filters.experience[0]) & (a["experience"] <= filters.experience[1])
+    return mask
+
+
+def evaluate_slice(a, filters):
+    lookups = a["lookups"]
+    mask = _mask(a, filters)
+    row = {
+        "ratings": int(mask.sum()),
+        "responses": int(np.count_nonzero(np.bincount(a["response"][mask], minlength=lookups["n_responses"]))),
+        "participants": int(np.count_nonzero(np.bincount(a["user"][mask], minlength=lookups["n_users"]))),
+    }
+
+    scored = mask & (a["class_true"] >= 0)
+    cm = metrics.confusion_matrix(a["class_true"][scored], a["class_pred"][scored], lookups["n_class"])
+    for name, value in metrics.scores_from_confusion(cm, "binary", lookups["pos"]).items():
+        row[f"class_{name}"] = float(value)
+
+    # per-label counts only: the free-text answers make a dense confusion matrix large
+    counts = metrics.label_counts(a["location_true"][mask], a["location_pred"][mask], lookups["n_location"])
+    for name, value in metrics.scores_from_label_counts(*counts, "macro").items():
+        row[f"location_{name}"] = float(value)
+
+    # first rating per (wordplay, participant) within the slice, as in irr.encode_ratings
+    rated = np.flatnonzero(mask & (a["unit"] >= 0) & (a["annotator"] >= 0) & (a["rating"] >= 0))
+    pairs = a["unit"][rated] * lookups["n_users"] + a["annotator"][rated]
+    _, first = np.unique(pairs, return_index=True)
+    rated = rated[first]
+    vbu = irr.value_by_unit(a["unit"][rated], a["rating"][rated], lookups["n_units"], lookups["n_ratings"])
+    row["alpha"] = irr.alpha_from_coincidences(irr.coincidence_matrix(vbu))
+    return row
+
+
+def _run_chunk(chunk):
+    rows = []
+    for key in chunk:
+        key = dict(key)
+        filters = key.pop("filters")
+        rows.append({**key, **evaluate_slice(_arrays, filters)})
+    return rows
+
+
+def _key(row):
+    return tuple(str(row[col]) for col in KEY_COLUMNS)
+
+
+def read_checkpoint(path):
+    """The complete rows of a checkpoint; a row cut off by an interruption is left out."""
+    if path is None or not Path(path).exists():
+        return []
+    with open(path, newline="") as fh:
+        return [row for row in csv.DictReader(fh) if None not in row and None not in row.values()]
+
+
+def sweep(df, checkpoint=None, processes=None, chunk_size=16):
+    """Evaluate every slice of :func:`grid` and return one tidy frame.
+
+    With a ``checkpoint`` path, finished slices are appended to that CSV and a
+    rerun only computes the slices missing from it.
+    """
+    columns = KEY_COLUMNS + SCORE_COLUMNS
+    finished = read_checkpoint(checkpoint)
+    done = {_key(row) for row in finished}
+    todo = [key for key in grid(df) if _key(key) not in done]
+    chunks = [todo[i:i + chunk_size] for i in range(0, len(todo), chunk_size)]
+
+    out = None
+    if checkpoint is not None:
+        # start from the complete rows only, then append as slices finish
+        out = open(checkpoint, "w", newline="")
+        writer = csv.DictWriter(out, fieldnames=columns)
+        writer.writeheader()
+        writer.writerows(finished)
+        out.flush()
+
+    rows = []
+    arrays, lookups = encode(df)
+    segments, layout = share(arrays)
+    try:
+        with ProcessPoolExecutor(max_workers=processes or os.cpu_count(),
+                                 initializer=_attach, initargs=(layout, lookups)) as pool:
+            for future in as_completed([pool.submit(_run_chunk, chunk) for chunk in chunks]):
+                result = future.result()
+                rows.extend(result)
+                if out is not None:
+                    writer.writerows(result)
+                    out.flush()
+    finally:
+        for segment in segments:
+            segment.close()
+            segment.unlink()
+        if out is not None:
+            out.close()
+
+    table = pd.read_csv(checkpoint) if checkpoint is not None else pd.DataFrame(rows, columns=columns)
+    # slices finish in any order; report them in grid order
+    order = {key: i for i, key in enumerate(_key(k) for k in grid(df))}
+    position = [order.get(_key(row), len(order)) for row in table[KEY_COLUMNS].to_dict(orient="records")]
+    return table.iloc[np.argsort(position, kind="stable")].reset_index(drop=True)